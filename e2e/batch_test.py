@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import io
+import os
+
+import numpy as np
+
+from gekko import GEKKO
+from gekko.gk_pool import SolverPool
+from gekko.gk_server import start
+import stub_solver
+import test_runner
+
+def scenarios(m):
+    """Model of the stub solver: x = 2*p"""
+    p = m.Param(value=2, name='p')
+    x = m.Var(name='x')
+    m.Equation(x == 2*p)
+    return p, x
+
+def batch_local():
+    with stub_solver.local_solver(stub_solver.write()):
+        m = GEKKO(remote=False)
+        p, x = scenarios(m)
+        m.solve(disp=False)
+        p.value = 5
+        assert p.VALUE.change is True
+
+        # the second scenario fails (the stub rejects negative parameters)
+        results = m.solve_batch([{p: 1}, {p: -1}, [('p', 3)]], workers=2)
+        assert list(results['APPSTATUS']) == [1, 0, 1]
+        assert list(results['x'][[0, 2], 0]) == [2.0, 6.0]
+        assert np.isnan(results['x'][1, 0])
+
+        # values and change flags of the model are left as they were
+        assert p.value == 5
+        assert p.VALUE.change is True
+        assert x.value == [4.0]
+
+        # so are measurements and the options changed since the last solve
+        f = m.FV(value=1)
+        f.MEAS = 3
+        dirty = set(f._dirty)
+        m.solve_batch([{p: 1}])
+        assert f.MEAS == 3
+        assert f._dirty == dirty
+        f._clean()
+        f.__dict__['MEAS'] = 3
+        m.solve_batch([{p: 1}])
+        assert f.MEAS == 3
+        assert '_dirty' not in f.__dict__
+
+def batch_remote():
+    server = start(apm_exe=stub_solver.write())
+    try:
+        m = GEKKO(remote=True, server=server.url)
+        p, x = scenarios(m)
+        results = m.solve_batch([{p: 4}, {p: -4}])
+        assert list(results['APPSTATUS']) == [1, 0]
+        assert results['x'][0, 0] == 8.0
+        assert p.value == 2
+
+        # the applications of the scenarios are cleared from the server
+        left = [f for folder, dirs, files in os.walk(server.root) for f in files]
+        assert left == [], left
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def worker_pool():
+    pool = SolverPool(2)
+    try:
+        with stub_solver.local_solver(stub_solver.write()):
+            # two models share the workers of the pool
+            models = [GEKKO(remote=False, worker_pool=pool) for i in range(2)]
+            for i, m in enumerate(models):
+                p, x = scenarios(m)
+                p.value = i + 1
+                m.solve(disp=False)
+                assert x.value == [2.0*(i+1)]
+                assert m.options.APPSTATUS == 1
+
+            # the output of a pool solve is printed once, as it arrives
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                models[0].solve(disp=True)
+            assert output.getvalue().count('Successful solution') == 1
+
+            # solver output of a job line by line, on the worker thread
+            lines = []
+            outs, errs = pool.submit([stub_solver.write(), models[0]._model_name], \
+                                     models[0]._path, 'lines', line_callback=lines.append).result()
+            assert lines == outs.splitlines() == ['Successful solution']
+
+            # batches use the pool of the model
+            results = models[0].solve_batch([{'p': 1}, {'p': -1}])
+            assert list(results['APPSTATUS']) == [1, 0]
+        assert pool.stats()['jobs'] == 6
+        names = [j['name'] for j in pool.latency]
+        assert set(m._model_name for m in models) <= set(names)
+    finally:
+        pool.shutdown()
+
+test_runner.test('Batch of local solves', batch_local)
+test_runner.test('Batch of remote solves', batch_remote)
+test_runner.test('Shared solver pool', worker_pool)
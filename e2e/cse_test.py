@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+
+import numpy as np
+
+from gekko import GEKKO
+import test_runner
+
+def model(cse, names='xyz'):
+    """Intermediates and Equations sections of a model with repeated
+    subexpressions, with m.cse on or off"""
+    m = GEKKO(remote=False)
+    m.time = np.linspace(0, 1, 3)
+    m.cse = cse
+    x, y, z = [m.Var(name=n) for n in names]
+    a = m.exp(x*y)
+    m.Intermediate(m.sin(x*y) + a, name='i')
+    m.Equation(z == (a + 1)**2 + (m.exp(x*y) + 1)**2 + m._intermediates[0])
+    m.Equation(y.dt() + x*y == (y.dt() + x*y)*z)
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    return model[model.index('Intermediates\n'):model.index('End Equations')].splitlines()
+
+def cse_off():
+    assert model(False) == [
+        'Intermediates',
+        '\ti=(sin((x*y))+exp((x*y)))',
+        'End Intermediates',
+        'Equations',
+        '\tz=(((exp((x*y))+1)^2)+((exp((x*y))+1)^2)+i)',
+        '\t($y+(x*y))=(($y+(x*y))*z)']
+
+def cse_on():
+    lines = model(True)
+    assert lines == [
+        'Intermediates',
+        '\tcse_1=(x*y)',
+        '\tcse_2=exp(cse_1)',
+        '\ti=(sin(cse_1)+cse_2)',
+        '\tcse_3=((cse_2+1)^2)',
+        'End Intermediates',
+        'Equations',
+        '\tz=(cse_3+cse_3+i)',
+        # subexpressions with a derivative stay in place
+        '\t($y+cse_1)=(($y+cse_1)*z)']
+
+    # each generated intermediate is defined before it is used
+    defined = set()
+    for line in lines:
+        used = set(re.findall(r'cse_\d+', line))
+        if '=' in line and line.strip().startswith('cse_'):
+            name = line.strip().split('=')[0]
+            used.discard(name)
+            assert used <= defined, line
+            defined.add(name)
+        else:
+            assert used <= defined, line
+
+def cse_names():
+    # names of the model's own objects are skipped
+    lines = model(True, names=['x', 'cse_1', 'z'])
+    assert '\tcse_2=(x*cse_1)' in lines
+    assert '\tcse_3=exp(cse_2)' in lines
+
+test_runner.test('CSE off', cse_off)
+test_runner.test('CSE on', cse_on)
+test_runner.test('CSE names', cse_names)
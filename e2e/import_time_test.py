@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+import time
+
+import test_runner
+
+def import_seconds(statement):
+    """Fastest of 3 runs of a fresh python importing a module"""
+    best = None
+    for i in range(3):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', statement])
+        t = time.time() - start
+        if best is None or t < best:
+            best = t
+    return best
+
+def import_time():
+    # the GUI (flask), plotting and http modules are only loaded when they
+    # are used
+    subprocess.check_call([sys.executable, '-c', 'import sys; import gekko; '
+                           'loaded = [m for m in ("flask", "werkzeug", "gekko.gk_gui", "matplotlib", '
+                           '"http.client", "urllib.request") if m in sys.modules]; '
+                           'assert not loaded, loaded'])
+
+    # import time compared with numpy, reported only (wall-clock times
+    # depend on the load of the machine)
+    numpy_time = import_seconds('import numpy')
+    gekko_time = import_seconds('import gekko')
+    print('import numpy %.3f s, import gekko %.3f s' % (numpy_time, gekko_time))
+
+test_runner.test('import time', import_time)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from gekko import GEKKO
+import stub_solver
+import test_runner
+
+def shared_names():
+    with stub_solver.local_solver(stub_solver.write()):
+        m = GEKKO(remote=False)
+        p = m.Param(value=3, name='p')
+        x = m.Var(name='x')
+        y = m.Var(name='x')
+        m.Equation(x == 2*p)
+        m.solve(disp=False)
+
+        # every object of a name gets its results
+        assert x.value == [6.0] and y.value == [6.0]
+        assert x.value.change is False and y.value.change is False
+
+        # batch scenarios set all parameters of a name
+        q = m.Param(value=3, name='p')
+        results = m.solve_batch([{'p': 1}, {p: 2}])
+        assert results['x'][0, 0] == 2.0
+        assert p.value == 3 and q.value == 3
+
+test_runner.test('Results of objects with the same name', shared_names)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import copy
+import pickle
+import threading
+import time
+
+from gekko import GEKKO
+import stub_solver
+import test_runner
+
+def model_copy():
+    m = GEKKO(remote=False)
+    p = m.Param(value=2)
+    x = m.Var()
+    m.Equation(x == p)
+
+    # the solve lock isn't copied: each copy gets its own
+    with m._solve_lock:
+        c = copy.deepcopy(m)
+        u = pickle.loads(pickle.dumps(m))
+    for other in (c, u):
+        assert other._solve_lock is not m._solve_lock
+        assert other._solve_lock.acquire(False)
+        other._solve_lock.release()
+        assert [v.name for v in other._variables] == [x.name]
+
+    # the copy solves in the background like the original
+    with stub_solver.local_solver(stub_solver.write()):
+        assert c.solve_async().result(timeout=60) is c
+    assert c._variables[0].value == [4.0]
+    assert x.value == 0
+
+def one_solve_at_a_time():
+    m = GEKKO(remote=False)
+    p = m.Param(value=2)
+    x = m.Var()
+    m.Equation(x == p)
+
+    # solve and solve_batch wait for a background solve of the model
+    with stub_solver.local_solver(stub_solver.write()):
+        finished = []
+        with m._solve_lock:
+            future = m.solve_async()
+            threads = [threading.Thread(target=lambda: finished.append(m.solve(disp=False))),
+                       threading.Thread(target=lambda: finished.append(m.solve_batch([{p: 1}])))]
+            for t in threads:
+                t.start()
+            time.sleep(0.5)
+            assert not future.done() and not finished
+        future.result(timeout=60)
+        for t in threads:
+            t.join(60)
+    assert len(finished) == 2
+    assert x.value == [4.0]
+    assert m._path == future.result()._path
+
+test_runner.test('Copy and pickle a model', model_copy)
+test_runner.test('One solve of a model at a time', one_solve_at_a_time)
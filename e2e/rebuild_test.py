@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from gekko import GEKKO
+import stub_solver
+import test_runner
+
+def rebuild():
+    with stub_solver.local_solver(stub_solver.write()):
+        m = GEKKO(remote=False)
+        p = m.Param(value=2)
+        x = m.Var(lb=0)
+        m.Equation(x == 2*p)
+        builds = []
+        build = m._build_model
+        m._build_model = lambda: (builds.append(1), build())[1]
+
+        # results turn the scalar values into arrays, the model is the same
+        m.solve(disp=False)
+        m.solve(disp=False)
+        assert len(builds) == 1
+        assert x.value == [4.0]
+
+        # changed values are sent in the csv file
+        p.value = 3
+        m.solve(disp=False)
+        assert len(builds) == 1
+        assert x.value == [6.0]
+
+        # bounds and equations are in the model file
+        x.upper = 100
+        m.solve(disp=False)
+        assert len(builds) == 2
+        m.Equation(x >= 1)
+        m.solve(disp=False)
+        m.solve(disp=False)
+        assert len(builds) == 3
+
+    # the csv file leaves changed scalar values to the model file in IMODE 2
+    fingerprint = m._fingerprint()
+    m.options.IMODE = 2
+    assert m._fingerprint() == fingerprint
+    p.value = 4
+    assert m._fingerprint() != fingerprint
+
+test_runner.test('Rebuild only changed models', rebuild)
@@ -10,3 +10,15 @@ import cruisecontrol_test
 import hw_flightcontrol_test
 import hw_HIV_test
 import hw_reservoirs_test
+import import_time_test
+import var_array_test
+import memory_test
+import value_change_test
+import server_test
+import model_copy_test
+import simplify_test
+import cse_test
+import batch_test
+import rebuild_test
+import solve_output_test
+import load_results_test
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import io
+import json
+import os
+
+from gekko import GEKKO, apm
+from gekko.gk_server import APMHandler, start
+import stub_solver
+import test_runner
+
+class NoGzipHandler(APMHandler):
+    """Server that refuses compressed requests (but announces gzip)"""
+    def do_POST(self):
+        if self.headers.get('Content-Encoding'):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self._send('Unsupported content encoding', 415)
+            return
+        APMHandler.do_POST(self)
+
+def remote_solve():
+    solver = stub_solver.write()
+    server = start(apm_exe=solver)
+    try:
+        m = GEKKO(remote=True, server=server.url)
+        p = m.Param(value=2)
+        x = m.Var()
+        y = m.Var()
+        m.cspline(x, y, [0, 1, 2, 3], [0, 1, 4, 9])
+        m.Equation(x == p)
+        m.solve(disp=False)
+        assert x.value == [4.0]
+
+        # unchanged model: only the csv and options are sent
+        p.value = 3
+        m.solve(disp=False)
+        assert x.value == [6.0]
+
+        # only the downloaded result files count as read
+        with open(os.path.join(m._path, 'results_all.csv'), 'w') as f:
+            f.write('0'*100000)
+        # (plus the solver output, streamed whether it is printed or not)
+        for disp in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):
+                m.solve(disp=disp)
+            solve = [phase for phase in m.stats.records[-1].phases if phase.name == 'solve'][0]
+            downloaded = sum(os.path.getsize(os.path.join(m._path, f_name)) for f_name in \
+                             ('results.json', 'options.json', 'results.csv'))
+            assert solve.bytes_read == downloaded + len('Successful solution\n')
+
+        # changed model: the cspline data is sent again with the model
+        # (the stub fails without it)
+        m.Equation(y >= 0)
+        m.solve(disp=False)
+        m.Equation(y <= 100)
+        m.solve(disp=False)
+        assert x.value == [6.0]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def session():
+    solver = stub_solver.write()
+    server = start(apm_exe=solver)
+    host = server.url.split('//')[1]
+    try:
+        # one kept-alive connection for all requests
+        ip = apm.get_ip(server.url)
+        connection = apm.session._connection('http', host)
+        apm.cmd(server.url, 'app', 'clear all')
+        assert apm.get_ip(server.url) == ip
+        assert apm.session._connection('http', host) is connection
+        assert connection.sock is not None
+
+        # the server announces gzip: large requests are sent compressed and
+        # large responses come back compressed
+        assert apm.session._accepts_gzip[host]
+        data = 'time,p1\n' + '0,1\n'*1000
+        apm.cmd(server.url, 'app', 'csv '+data)
+        assert apm.get_file(server.url, 'app', 'app.csv', ip).decode() == data
+        f = apm.session.open(server.url + '/online/' + ip + '_app/app.csv')
+        assert isinstance(f, apm.Decompressed)
+        assert f.read().decode() == data
+
+        # solver output is streamed line by line, result files downloaded
+        # together
+        apm.cmd(server.url, 'app', ' Model\nParameters\n\tp1 = 1\nEnd Parameters\n'
+                'Variables\n\tv1\nEnd Variables\nEnd Model\n')
+        lines = []
+        response = apm.cmd(server.url, 'app', 'solve', False, line_callback=lines.append)
+        assert '@error' not in response
+        assert 'Successful solution' in lines
+        files = apm.get_files(server.url, 'app', ['results.json', 'options.json'], ip)
+        assert json.loads(files['results.json'].decode())['v1'] == [2.0]*1000
+        assert json.loads(files['options.json'].decode())['APM']['APPSTATUS'] == 1
+
+        # a server that refuses compressed requests gets them uncompressed
+        # (new connection: a kept-alive one stays with its handler)
+        server.RequestHandlerClass = NoGzipHandler
+        apm.session.close()
+        apm.cmd(server.url, 'app', 'clear csv')
+        apm.cmd(server.url, 'app', 'csv '+data)
+        assert host in apm.session._rejects_gzip
+        assert not apm.session._accepts_gzip[host]
+        assert apm.get_file(server.url, 'app', 'app.csv', ip).decode() == data
+    finally:
+        apm.session.close()
+        server.shutdown()
+        server.server_close()
+
+test_runner.test('Remote solve on the local server', remote_solve)
+test_runner.test('Server session', session)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import os
+
+from gekko import GEKKO
+from gekko.gk_operators import GK_Expression
+from gekko.gk_write_files import _simplify
+import test_runner
+
+def equations(*eqs):
+    """Equations section of the model file written for eqs"""
+    m = GEKKO(remote=False)
+    x, y, z = [m.Var(name=n) for n in 'xyz']
+    for eq in eqs:
+        m.Equation(eq(x, y, z))
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    start = model.index('Equations\n') + len('Equations\n')
+    return [line.strip() for line in model[start:model.index('End Equations')].splitlines()]
+
+def simplify_sums():
+    assert equations(
+        lambda x, y, z: x - (y - z) == 0,      # sign flips of nested sums
+        lambda x, y, z: x - (y + 2) - 3 == 0,
+        lambda x, y, z: -(x + y) + z == 0,
+        lambda x, y, z: x - (-y) == 0,
+        lambda x, y, z: x + 0 == y,            # identities
+        lambda x, y, z: x - 5 + 5 == y,
+        lambda x, y, z: -(-x) == 1,
+    ) == ['(x-y+z)=0', '(x-y-5)=0', '(z-x-y)=0', '(x+y)=0', 'x=y', 'x=y', 'x=1']
+
+def leading_negation():
+    # a sum leads with a positive term when it has one
+    assert equations(
+        lambda x, y, z: -x + y == 0,
+        lambda x, y, z: -x - y == 0,
+        lambda x, y, z: 0 - x == 1,
+    ) == ['(y-x)=0', '((-x)-y)=0', '(-x)=1']
+
+def simplify_products():
+    assert equations(
+        lambda x, y, z: 0*x + y == 0,          # 0*x is left to the solver
+        lambda x, y, z: x*1 == y,
+        lambda x, y, z: 2*x*3 == y,
+        lambda x, y, z: x*y*(z*2) == 1,
+        lambda x, y, z: x/(y/z) == 1,          # nested division
+        lambda x, y, z: x/2/3 == y,
+        lambda x, y, z: 6*x/3 == y,
+        lambda x, y, z: x/4*2 == y,
+        lambda x, y, z: 3*x/2 == y,
+        lambda x, y, z: x/(-2) == y,
+        lambda x, y, z: 3/(x*6) == y,
+        lambda x, y, z: x*(2.0/4) == y,
+        lambda x, y, z: x/0 == y,              # left for the solver to report
+    ) == ['((0*x)+y)=0', 'x=y', '(6*x)=y', '(2*x*y*z)=1', '(x/y*z)=1', '(x/6)=y',
+          '(2*x)=y', '(x/2)=y', '(3*x/2)=y', '((-1)*x/2)=y', '(1/x/2)=y',
+          '(0.5*x)=y', '(x/0)=y']
+
+def simplify_powers():
+    assert equations(
+        lambda x, y, z: x**1 == y,
+        lambda x, y, z: (x*1)**2 == y,
+        lambda x, y, z: (2*x)**1 == y,
+        lambda x, y, z: (x**2)**1 == y,
+    ) == ['x=y', '(x^2)=y', '(2*x)=y', '(x^2)=y']
+
+def integer_constants():
+    # integers stay integers, floats stay floats
+    assert equations(
+        lambda x, y, z: x + 2 + 3 == y,
+        lambda x, y, z: x + 1.5 + 1.5 == y,
+        lambda x, y, z: 2*x*2.5 == y,
+        lambda x, y, z: 1 + x - x*1 + 2 == y,
+    ) == ['(x+5)=y', '(x+3.0)=y', '(5.0*x)=y', '(x-x+3)=y']
+
+def constant_powers():
+    # powers of numbers are folded unless the result is a huge integer,
+    # which is left for the solver without being computed
+    folded = _simplify([GK_Expression('^', 2, 10), GK_Expression('^', 2.0, 0.5),
+                        GK_Expression('^', -8, 0.5), GK_Expression('^', 10, 10**9),
+                        GK_Expression('^', 2, -2)])
+    assert folded[0] == 1024 and folded[1] == 2.0**0.5 and folded[4] == 0.25
+    assert str(folded[2]) == '((-8)^0.5)'
+    assert str(folded[3]) == '(10^1000000000)'
+
+test_runner.test('Simplify sums', simplify_sums)
+test_runner.test('Simplify leading negation', leading_negation)
+test_runner.test('Simplify products', simplify_products)
+test_runner.test('Simplify powers', simplify_powers)
+test_runner.test('Simplify integer constants', integer_constants)
+test_runner.test('Simplify constant powers', constant_powers)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import io
+
+from gekko import GEKKO
+from gekko.gk_pool import SolverPool
+from gekko.gk_server import start
+import stub_solver
+import test_runner
+
+def model(m):
+    p = m.Param(value=2)
+    x = m.Var()
+    m.Equation(x == p)
+    return x
+
+def local_lines():
+    pool = SolverPool(1)
+    try:
+        with stub_solver.local_solver(stub_solver.write()):
+            for m in (GEKKO(remote=False), GEKKO(remote=False, worker_pool=pool)):
+                x = model(m)
+                lines = []
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    m.solve(disp=False, line_callback=lines.append)
+                assert lines == ['Successful solution']
+                assert output.getvalue() == ''
+                assert x.value == [4.0]
+
+                # with disp=True the lines are also printed, once
+                lines = []
+                with contextlib.redirect_stdout(output):
+                    m.solve(disp=True, line_callback=lines.append)
+                assert lines == ['Successful solution']
+                assert output.getvalue().count('Successful solution') == 1
+
+                lines = []
+                m.solve_async(line_callback=lines.append).result(timeout=60)
+                assert lines == ['Successful solution']
+    finally:
+        pool.shutdown()
+
+def remote_lines():
+    server = start(apm_exe=stub_solver.write())
+    try:
+        m = GEKKO(remote=True, server=server.url)
+        x = model(m)
+        lines = []
+        m.solve(disp=False, line_callback=lines.append)
+        assert lines == ['Successful solution']
+        assert x.value == [4.0]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+test_runner.test('Local solver output lines', local_lines)
+test_runner.test('Remote solver output lines', remote_lines)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the apm executable, for tests of the local solve, batch and
+server code paths that don't depend on the real solver.
+
+The stub reads the model and csv file of the application and writes
+results.json, options.json and results.csv:
+    parameters keep their values (csv columns, else the declared value)
+    each variable is 2 * the first parameter
+    a negative parameter value fails the solve with @error
+    each cspline object needs its data file (in the folder or as a File
+    section appended to the model, as the server stores it)
+"""
+import contextlib
+import os
+import stat
+import sys
+import tempfile
+
+_program = r'''
+import json, os, re, sys
+name = sys.argv[1]
+with open(name+'.apm') as f:
+    model = f.read()
+
+def section(title):
+    m = re.search(r'\n%s\n(.*?)\nEnd %s' % (title, title), model, re.S)
+    return m.group(1).split('\n') if m else []
+
+def declared(lines):
+    values = []
+    for line in lines:
+        m = re.match(r'\s*(\w+)(?:\[(\d+):(\d+)\])?\s*(?:=\s*([^,\s]+))?', line)
+        value = float(m.group(4)) if m.group(4) else 0.0
+        if m.group(2):
+            for k in range(int(m.group(2)), int(m.group(3))+1):
+                values.append(('%s[%d]' % (m.group(1), k), value))
+        else:
+            values.append((m.group(1), value))
+    return values
+
+for line in section('Objects'):
+    obj = line.split('=')[0].strip()
+    if 'cspline' in line and 'File %s.csv' % obj not in model \
+            and not os.path.isfile(obj+'.csv'):
+        print('@error: data file of ' + obj + ' not found')
+        sys.exit(0)
+
+columns = {}
+rows = 1
+if os.path.isfile(name+'.csv'):
+    with open(name+'.csv') as f:
+        lines = [l.rstrip('\n').split(',') for l in f if l.strip()]
+    rows = len(lines) - 1
+    for k, h in enumerate(lines[0]):
+        columns[h] = [l[k] for l in lines[1:]]
+
+results = {}
+if 'time' in columns:
+    results['time'] = [float(v) for v in columns['time']]
+for p, value in declared(section('Parameters')):
+    results[p] = [float(v) if v.strip() else value \
+                  for v in columns.get(p, [' ']*rows)]
+    if min(results[p]) < 0:
+        print('@error: negative parameter ' + p)
+        sys.exit(0)
+first = next(iter(declared(section('Parameters'))), (None, 0.0))
+for v, value in declared(section('Variables')):
+    results[v] = [2*x for x in results.get(first[0], [0.0]*rows)]
+
+with open('results.json', 'w') as f:
+    json.dump(results, f)
+with open('options.json', 'w') as f:
+    json.dump({'APM': {'APPINFO': 0, 'APPINFOCHG': 0, 'APPSTATUS': 1, 'CTRLMODE': 1,
+                       'ITERATIONS': 1, 'OBJFCNVAL': 0.0, 'SOLVESTATUS': 1,
+                       'SOLVETIME': 0.0, 'BAD_CYCLES': 0, 'COLDSTART': 0,
+                       'CTRL_HOR': 1, 'CTRL_TIME': 60, 'CYCLECOUNT': 0,
+                       'PRED_HOR': 1.0, 'PRED_TIME': 60.0}}, f)
+with open('results.csv', 'w') as f:
+    f.write('time\n0\n')
+print('Successful solution')
+'''
+
+
+def write(folder=None):
+    """Write the stub solver (an executable named apm) and return its path"""
+    folder = folder or tempfile.mkdtemp(suffix='stub_solver')
+    path = os.path.join(folder, 'apm')
+    with open(path, 'w') as f:
+        f.write('#!' + sys.executable + '\n' + _program)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+@contextlib.contextmanager
+def local_solver(path):
+    """Local solves (and batches) run the stub at path instead of apm"""
+    import gekko.gk_batch
+    modules = [sys.modules['gekko.gekko'], gekko.gk_batch]
+    saved = [module.local_solver for module in modules]
+    for module in modules:
+        module.local_solver = lambda: (path, False)
+    try:
+        yield
+    finally:
+        for module, f in zip(modules, saved):
+            module.local_solver = f
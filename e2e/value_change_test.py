@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from gekko import GEKKO
+import test_runner
+
+def value_change():
+    m = GEKKO(remote=False)
+    m.time = np.linspace(0, 1, 6)
+    m.options.IMODE = 6
+    p = m.Param(value=np.zeros(6))
+    q = m.Param(value=[0.0]*6)
+    r = m.Param(value=[1.0]*6)
+    m._write_csv()
+
+    # changed elements are kept in a mask that doesn't grow with more writes
+    for cycle in range(1000):
+        p.value[2] = cycle
+        p[3] = 1
+    assert list(p.value.change) == [False, False, True, True, False, False]
+    q.value.set_values(np.array([True, False, False, False, False, True]), [5, 6])
+    r.value.set_slice(1, 3, [8, 9])
+
+    # only the changed elements are written to the csv file
+    m._write_csv()
+    with open(os.path.join(m._path, m._model_name+'.csv')) as f:
+        rows = [line.rstrip('\n').split(',')[1:] for line in f][1:]
+    assert rows == [[' ', '5.0', ' '], [' ', ' ', '8.0'], ['999.0', ' ', '9.0'],
+                    ['1.0', ' ', ' '], [' ', ' ', ' '], [' ', '6.0', ' ']]
+    assert p.value.change is False
+
+test_runner.test('Value change tracking', value_change)
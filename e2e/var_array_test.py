@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from gekko import GEKKO
+import stub_solver
+import test_runner
+
+def var_array():
+    m = GEKKO(remote=False)
+    n = 100000
+    x = m.VarArray(n, value=1, lb=0, ub=10)
+    x.upper[n//2:] = 20
+    y = m.VarArray((2,3), name='y')
+
+    # elements, slices and element-wise equations
+    assert x[0].name == 'va1[1]'
+    assert y[1,2].name == 'y[6]'
+    assert x[2:5].shape == (3,)
+    eqs = m.Equation(x[1:] - x[:-1] >= 0)
+    assert len(eqs) == n-1
+    m.Equation(y == np.arange(6).reshape(2,3))
+    m.Obj(x.sum())
+
+    # one declaration per run of equal values and bounds
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    assert '\tva1[1:50000] = 1.0, <= 10.0, >= 0.0\n' in model
+    assert '\tva1[50001:100000] = 1.0, <= 20.0, >= 0.0\n' in model
+    assert '\ty[1:6]\n' in model
+    assert '\t(va1[2:100000]-va1[1:99999])>=0\n' in model
+    assert '\ty[1]=0\n' in model
+
+def indexed_arrays():
+    m = GEKKO(remote=False)
+    x = m.Array(m.Var, 100, indexed=True, lb=0)
+    x[-1].upper = 5
+    p = m.Array(m.Param, 100, indexed=True, value=2)
+
+    # elements are named name[1], name[2], ...
+    assert x[0].name == 'v1[1]'
+    assert p[99].name == 'p1[100]'
+    for i in range(1, 100):
+        m.Equation(x[i] == p[i]*x[i-1])
+    m.Equation(x[0] == 1)
+
+    # arrays and equations over arrays are written in indexed form
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    assert '\tp1[1:100] = 2\n' in model
+    assert '\tv1[1:99] = 0, >= 0\n' in model
+    assert '\tv1[100] = 0, <= 5, >= 0\n' in model
+    assert '\tv1[2:100]=(p1[2:100]*v1[1:99])\n' in model
+    assert '\tv1[1]=1\n' in model
+
+    # elements are named before anything refers to them by name
+    m = GEKKO(remote=False)
+    x = m.Array(m.Var, 3, indexed=True, fixed_initial=False)
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    assert '\tv1[1:3] = 0\n' in model
+    for k in range(1, 4):
+        assert '\tp(1).n(1).v1[%d]=calculated\n' % k in model
+    assert 'v1=calculated' not in model
+
+    # by default elements are separate variables v1, v2, ...
+    m = GEKKO(remote=False)
+    x = m.Array(m.Var, 3, lb=0)
+    assert [e.name for e in x.flat] == ['v1', 'v2', 'v3']
+    assert m.Var(name='X[1]').name == 'x_1_'
+    m.Equation(x[1] == x[0])
+    m.Equation(x[2] == x[1])
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    assert '\tv1 = 0, >= 0\n\tv2 = 0, >= 0\n\tv3 = 0, >= 0\n' in model
+    assert '\tv2=v1\n\tv3=v2\n' in model
+
+def dynamic_array():
+    m = GEKKO(remote=False)
+    m.time = np.linspace(0, 1, 11)
+    m.options.IMODE = 4
+    x = m.VarArray(3, value=1)
+    k = m.Param(value=2)
+    m.Equation(x[0].dt() == -k*x[0])
+    m.Equation([x[i].dt() == x[i-1] - x[i] for i in range(1, 3)])
+
+    # derivatives of elements
+    m._build_model()
+    with open(os.path.join(m._path, m._model_name+'.apm')) as f:
+        model = f.read()
+    assert '\t$va1[1]=((-p1)*va1[1])\n' in model
+    assert '\t$va1[2:3]=(va1[1:2]-va1[2:3])\n' in model
+
+    # one row over time per element
+    with stub_solver.local_solver(stub_solver.write()):
+        m.solve(disp=False)
+    assert x.value.shape == (3, 11)
+    assert list(x[1].value) == [4.0]*11
+
+def var_array_options():
+    m = GEKKO(remote=False)
+    for shape in (0, (3, 0)):
+        try:
+            m.VarArray(shape)
+            assert False, shape
+        except ValueError as e:
+            assert 'at least one element' in str(e)
+    x = m.VarArray(3)
+    for option, value in (('status', 1), ('value', [[1, 2]]*3)):
+        try:
+            setattr(x, option, value)
+            assert False, option
+        except (AttributeError, ValueError) as e:
+            assert 'variable array' in str(e)
+    assert m._arrays == [x]
+
+test_runner.test('VarArray', var_array)
+test_runner.test('Indexed arrays', indexed_arrays)
+test_runner.test('Dynamic arrays', dynamic_array)
+test_runner.test('VarArray options', var_array_options)
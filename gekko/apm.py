@@ -1,53 +1,236 @@
 # Import
+import codecs
+import socket
 import string
 import sys
+import threading
+import zlib
 
 # Get Python version
 ver = sys.version_info[0]
 #print('Version: '+str(ver))
 if ver==2:  # Python 2
     import urllib    
+    from urlparse import urlsplit, urljoin
 else:       # Python 3+
-    import urllib.request, urllib.parse, urllib.error
-    #import socket
+    import urllib.parse
+    from urllib.parse import urlsplit, urljoin
+
+
+def _http():
+    '''HTTP modules, imported with the first request (they are slow to
+       import and not used by local solves)'''
+    if ver == 2:
+        import httplib as http_client
+        return http_client, urllib.urlopen, urllib.getproxies
+    import http.client as http_client
+    import urllib.request
+    return http_client, urllib.request.urlopen, urllib.request.getproxies
+
+
+class Session(object):
+    '''Keep-alive HTTP(S) connections to the APM servers. Each thread keeps
+       one open connection per server that is reused by all requests, so a
+       remote solve doesn't open a new TCP connection per file or command.
+       A connection that was closed by the server is opened again.
+
+       With compress=True, responses are requested with gzip or deflate
+       content coding and request bodies (of at least min_compress bytes)
+       are sent gzip compressed to servers that announce gzip in the
+       Accept-Encoding header of their responses (RFC 7694).'''
+
+    def __init__(self, timeout=None, compress=True, min_compress=1024):
+        self.timeout = timeout
+        self.compress = compress
+        self.min_compress = min_compress
+        self._local = threading.local()
+        #server -> True/False when the server (doesn't) accept gzip requests
+        self._accepts_gzip = {}
+        self._rejects_gzip = set()
+
+    def _connection(self, scheme, host):
+        connections = self._local.__dict__.setdefault('connections', {})
+        c = connections.get((scheme, host))
+        if c is None:
+            http_client = _http()[0]
+            if scheme == 'https':
+                c = http_client.HTTPSConnection(host, timeout=self.timeout)
+            else:
+                c = http_client.HTTPConnection(host, timeout=self.timeout)
+            connections[(scheme, host)] = c
+        return c
+
+    def _drop(self, scheme, host):
+        c = self._local.__dict__.get('connections', {}).pop((scheme, host), None)
+        if c is not None:
+            c.close()
+
+    def open(self, url, data=None):
+        '''GET url (or POST data, bytes) and return the response. The
+           response must be read to the end before the next request'''
+        http_client, urlopen, getproxies = _http()
+        url = url.strip()
+        parts = urlsplit(url)
+        if parts.scheme in getproxies():
+            #connections to a proxy are left to urllib
+            return urlopen(url, data)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        headers = {'Connection': 'keep-alive'}
+        if self.compress:
+            headers['Accept-Encoding'] = 'gzip, deflate'
+        body = data
+        if data is None:
+            method = 'GET'
+        else:
+            method = 'POST'
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            if self.compress and len(data) >= self.min_compress \
+                    and self._accepts_gzip.get(parts.netloc):
+                z = zlib.compressobj(6, zlib.DEFLATED, 16+zlib.MAX_WBITS)
+                body = z.compress(data) + z.flush()
+                headers['Content-Encoding'] = 'gzip'
+        while True:
+            c = self._connection(parts.scheme, parts.netloc)
+            reused = c.sock is not None
+            try:
+                c.request(method, path, body, headers)
+                response = c.getresponse()
+                break
+            except (http_client.HTTPException, socket.error):
+                #a kept-alive connection closed by the server is opened again
+                self._drop(parts.scheme, parts.netloc)
+                if not reused:
+                    raise
+        accept = response.getheader('Accept-Encoding')
+        if accept is not None and parts.netloc not in self._rejects_gzip:
+            self._accepts_gzip[parts.netloc] = 'gzip' in accept.lower()
+        if response.status == 415 and body is not data:
+            #compressed request rejected: send it (and the next ones) as it is
+            response.read()
+            self._accepts_gzip[parts.netloc] = False
+            self._rejects_gzip.add(parts.netloc)
+            return self.open(url, data)
+        if response.status in (301, 302, 303, 307, 308):
+            response.read()
+            return self.open(urljoin(url, response.getheader('Location')), data)
+        if response.status >= 400:
+            response.read()
+            raise IOError('HTTP error ' + str(response.status) + ': ' + url)
+        encoding = (response.getheader('Content-Encoding') or '').lower()
+        if encoding in ('gzip', 'x-gzip', 'deflate'):
+            return Decompressed(response, encoding)
+        return response
+
+    def close(self):
+        '''Close the connections of this thread'''
+        for c in self._local.__dict__.pop('connections', {}).values():
+            c.close()
+
+#connections shared by all models
+session = Session()
+
+
+class Decompressed(object):
+    '''Response with gzip or deflate content coding, decompressed while it
+       is read'''
+
+    def __init__(self, response, encoding):
+        self._response = response
+        self._read = getattr(response, 'read1', response.read)
+        if encoding == 'deflate':
+            self._z = zlib.decompressobj()
+        else:
+            self._z = zlib.decompressobj(16+zlib.MAX_WBITS)
+        self._buffer = b''
+
+    def read1(self, n=8192):
+        '''Up to n bytes, without waiting for more data than needed'''
+        while not self._buffer and self._z is not None:
+            chunk = self._read(n)
+            if chunk:
+                self._buffer = self._z.decompress(chunk)
+            else:
+                self._buffer = self._z.flush()
+                self._z = None
+                self._response.read() # end of the response
+        data = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return data
+
+    def read(self, n=-1):
+        if n is not None and n >= 0:
+            return self.read1(n)
+        data = []
+        while True:
+            chunk = self.read1(65536)
+            if not chunk:
+                return b''.join(data)
+            data.append(chunk)
+
+
+def stream_lines(f, callback, chunk_size=8192):
+    '''Call callback(line) for each line of the response f as it arrives.
+       The response is read in chunks (whatever the server sent so far, up to
+       chunk_size bytes) and split into lines, instead of byte by byte'''
+    read = getattr(f, 'read1', f.read)
+    if ver == 2:
+        decode = lambda chunk: chunk
+    else:
+        #characters may be split between chunks
+        decode = codecs.getincrementaldecoder('utf-8')('replace').decode
+    tail = ''
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            f.read() # end of the response (so the connection can be reused)
+            break
+        lines = (tail + decode(chunk)).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            callback(line)
+    if tail:
+        callback(tail)
+
+
+def _solve_output(f, disp, debug, line_callback):
+    '''Stream the solver output of f (printed if disp, passed to
+       line_callback) and return the output from the first @error line on'''
+    apm_error = []
+    def on_line(line):
+        if disp:
+            print(line)
+        if line_callback is not None:
+            line_callback(line)
+        if debug >= 1:
+            # Start recording output if error is detected
+            if apm_error or '@error' in line:
+                apm_error.append(line + '\n')
+    stream_lines(f, on_line)
+    return ''.join(apm_error)
+
 
 if ver==2:  # Python 2
 
-    def cmd(server, app, aline, disp=True, debug=1):
+    def cmd(server, app, aline, disp=True, debug=1, line_callback=None):
         '''Send a request to the server \n \
            server = address of server \n \
            app      = application name \n \
            aline  = line to send to server \n \
-           disp = Print output \n'''
+           disp = Print output \n \
+           line_callback = function called with each line of solver output \n'''
         try:
             # Web-server URL address
             url_base = string.strip(server) + '/online/apm_line.php'
             app = app.lower()
             app.replace(" ", "")
             params = urllib.urlencode({'p': app, 'a': aline})
-            f = urllib.urlopen(url_base, params)
-            # initialize apm_error recording
-            record_error = False
+            f = session.open(url_base, params)
             apm_error = ''
             # Stream solution output
             if(aline=='solve'):
-                line = ''
-                while True:
-                    char = f.read(1)
-                    if not char:
-                        break
-                    elif char == '\n':
-                        if disp: 
-                            print(line)
-                        if debug >= 1:
-                            # Start recording output if error is detected
-                            if '@error' in line:
-                                record_error = True
-                            if record_error:
-                                apm_error+= line + '\n'
-                        line = ''
-                    else:
-                        line += char
+                apm_error = _solve_output(f, disp, debug, line_callback)
             # Send request to web-server
             if apm_error != '': # check if any apm errors were found
                 response = apm_error
@@ -63,22 +246,24 @@ if ver==2:  # Python 2
            server   = address of server'''
         # get ip address for web-address lookup
         url_base = string.strip(server) + '/ip.php'
-        f = urllib.urlopen(url_base)
+        f = session.open(url_base)
         ip = string.strip(f.read())
         return ip
 
-    def get_file(server,app,filename):
+    def get_file(server,app,filename,ip=None):
         '''Retrieve any file from web-server\n \
            server   = address of server \n \
-           app      = application name '''
+           app      = application name \n \
+           ip       = IP address from get_ip (looked up if None) '''
         # Retrieve IP address
-        ip = get_ip(server)
+        if ip is None:
+            ip = get_ip(server)
         
         # Web-server URL address
         app = app.lower()
         app.replace(" ","")
         url = string.strip(server) + '/online/' + ip + '_' + app + '/' + filename
-        f = urllib.urlopen(url)
+        f = session.open(url)
         # Send request to web-server
         file = f.read()
         # Write the file
@@ -89,12 +274,13 @@ if ver==2:  # Python 2
 
 else:       # Python 3+
     
-    def cmd(server,app,aline, disp=True, debug=1):
+    def cmd(server,app,aline, disp=True, debug=1, line_callback=None):
         '''Send a request to the server \n \
            server = address of server \n \
            app      = application name \n \
            aline  = line to send to server \n \
-           disp = Print output \n'''
+           disp = Print output \n \
+           line_callback = function called with each line of solver output \n'''
         try:
             # Web-server URL address
             url_base = server.strip() + '/online/apm_line.php'
@@ -102,30 +288,11 @@ else:       # Python 3+
             app.replace(" ","")
             params = urllib.parse.urlencode({'p':app,'a':aline})
             en_params = params.encode()
-            f = urllib.request.urlopen(url_base,en_params)
-            # initialize apm_error recording
-            record_error = False
+            f = session.open(url_base,en_params)
             apm_error = ''
             # Stream solution output
             if(aline=='solve'):
-                line = ''
-                while True:
-                    en_char = f.read(1)
-                    char = en_char.decode()
-                    if not char:
-                        break
-                    elif char == '\n':
-                        if disp:
-                            print(line)
-                        if debug >= 1:
-                            # Start recording output if error is detected
-                            if '@error' in line:
-                                record_error = True
-                            if record_error:
-                                apm_error+= line + '\n'
-                        line = '' # reset line
-                    else:
-                        line += char
+                apm_error = _solve_output(f, disp, debug, line_callback)
             if apm_error != '': # check if any apm errors were found
                 response = apm_error
             else:
@@ -141,23 +308,25 @@ else:       # Python 3+
            server   = address of server'''
         # get ip address for web-address lookup
         url_base = server.strip() + '/ip.php'
-        f = urllib.request.urlopen(url_base)
+        f = session.open(url_base)
         fip = f.read()
         ip = fip.decode().strip()
         return ip
 
-    def get_file(server,app,filename):
+    def get_file(server,app,filename,ip=None):
         '''Retrieve any file from web-server\n \
            server   = address of server \n \
-           app      = application name '''
+           app      = application name \n \
+           ip       = IP address from get_ip (looked up if None) '''
         # Retrieve IP address
-        ip = get_ip(server)
+        if ip is None:
+            ip = get_ip(server)
         
         # Web-server URL address
         app = app.lower()
         app.replace(" ","")
         url = server.strip() + '/online/' + ip + '_' + app + '/' + filename
-        f = urllib.request.urlopen(url)
+        f = session.open(url)
         # Send request to web-server
         file = f.read()
         # Write the file
@@ -166,6 +335,32 @@ else:       # Python 3+
         #fh.write(en_file)
         #fh.close()
         return (file)
-            
 
 
+
+#downloads run on persistent threads, so each keeps its connections open
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError: # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+_downloads = None
+_downloads_lock = threading.Lock()
+
+def get_files(server, app, filenames, ip=None):
+    '''Retrieve several files from web-server at the same time\n \
+       server   = address of server \n \
+       app      = application name \n \
+       filenames = names of the files \n \
+       ip       = IP address from get_ip (looked up once if None) \n \
+       Returns a dictionary of filename -> file'''
+    global _downloads
+    if ip is None:
+        ip = get_ip(server)
+    if ThreadPoolExecutor is None:
+        return dict((filename, get_file(server, app, filename, ip)) for filename in filenames)
+    with _downloads_lock:
+        if _downloads is None:
+            _downloads = ThreadPoolExecutor(max_workers=4)
+    jobs = [(filename, _downloads.submit(get_file, server, app, filename, ip)) \
+            for filename in filenames]
+    return dict((filename, job.result()) for filename, job in jobs)
@@ -4,15 +4,18 @@ import subprocess
 import glob
 import re
 import tempfile # for temporary directory
+import threading
 import numpy as np
 from shutil import rmtree
-from .apm import cmd, get_file # remote solve functions
+from .apm import cmd, get_ip, get_files # remote solve functions
 from .gk_global_options import GKGlobalOptions
 from .gk_parameter import GKParameter, GK_MV, GK_FV
 from .gk_variable import GKVariable, GK_CV, GK_SV
-from .gk_operators import GK_Operators, GK_Intermediate
+from .gk_operators import GK_Operators, GK_Constant, GK_Intermediate, GK_Expression
+from .gk_pool import SolverPool, async_executor, local_solver, _stream
+from .gk_stats import SolveStats
+from .gk_var_array import GKVarArray
 from itertools import count
-from .gk_gui import GK_GUI
 
 #%% Python version compatibility
 ver = sys.version_info[0]
@@ -28,13 +31,16 @@ else:  # Python 3+
     def compatible_string_strip(s):
         return s.strip()
 
-# detect IPython
-try:
-    __IPYTHON__
-except NameError:
-    ipython=False
-else:
-    ipython=True
+class _ElementName(str):
+    """Name name[k] of an element of m.Array(..., indexed=True), used as it is"""
+    pass
+
+def _element_name(name):
+    """Name of a parameter or variable: lower case with non-word characters
+    replaced (names of indexed array elements are kept)"""
+    if isinstance(name, _ElementName):
+        return str(name)
+    return re.sub(r'\W+', '_', name).lower()
 
 def _try(o):
     try:
@@ -46,26 +52,41 @@ def _try(o):
 #%% Equation Object Class, to allow referencing equation later
 class EquationObj(object):
     def __init__(self, value):
-        self.value = str(value)
+        #expressions are kept as trees and rendered when the model is written
+        if isinstance(value, GK_Operators):
+            self.value = value
+        else:
+            self.value = str(value)
     def __str__(self):
-        return self.value
+        return str(self.value)
 
 #%%Create class
 class GEKKO(object):
     """Create a model object. This is the basic object for solving optimization problems"""
     _ids = count(0) #keep track of number of active class instances to not overwrite each other with default model name
 
-    def __init__(self, remote=True, server='http://byu.apmonitor.com', name=None):
+    def __init__(self, remote=True, server='http://byu.apmonitor.com', name=None, worker_pool=None):
         self._remote = remote
         self._server = compatible_string_strip(server)
         self.options = GKGlobalOptions()
         self._id = next(self._ids) #instance count of class
         self._gui_open = False
 
+        #persistent local solver workers: number of workers or a SolverPool
+        #shared with other models
+        if worker_pool is not None and remote:
+            raise ValueError('worker_pool is only used for local solves (remote=False)')
+        if worker_pool is not None and not isinstance(worker_pool, SolverPool):
+            worker_pool = SolverPool(worker_pool)
+        self.worker_pool = worker_pool
+        #one solve (solve, solve_async, solve_batch) of the model at a time
+        self._solve_lock = threading.RLock()
+
         #keep a list of constants, params, vars, eqs, etc associated with this model
         self._constants = []
         self._parameters = []
         self._variables = []
+        self._arrays = []
         self._intermediates = []
         self._inter_equations = []
         self._equations = []
@@ -74,6 +95,9 @@ class GEKKO(object):
         self._objects = []
         self._compounds = []
         self._raw = []
+        #name -> constants, parameters, variables, variable arrays and
+        #intermediates of that name (names don't have to be unique)
+        self._name_index = {}
 
         #time discretization
         self.time = None
@@ -81,6 +105,18 @@ class GEKKO(object):
         self._model_initialized = False #probably not needed
         self._csv_status = None #indicate 'provided' or 'generated'
         self._model = ''
+        #structure of the last .apm file written, to skip unchanged rebuilds
+        self._model_fingerprint = None
+        #model, solver options and extra files already sent to the server
+        self._uploaded = None
+        #IP address of this computer as seen by the server
+        self._ip = None
+        #content hash of the extra files in the model folder
+        self._file_digests = {}
+        #all options are in the application database (after a successful solve)
+        self._options_synced = False
+        #parsed results.json and options.json of the last solve
+        self._json_cache = {}
 
         #Default model name, numbered to allow multiple models
         if name == None:
@@ -94,11 +130,28 @@ class GEKKO(object):
         self._extra_files = []
         #list of strings for solver options
         self.solver_options = []
+        #promote repeated subexpressions to Intermediates in the model file
+        self.cse = False
+        #time, bytes written and read of each phase of the solves
+        self.stats = SolveStats()
 
         #clear anything already on the server
         if self._remote:
             cmd(self._server,self._model_name,'clear all')
 
+    #copies and pickles of a model get their own (unlocked) solve lock
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_solve_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._solve_lock = threading.RLock()
+
+    def _register(self, x):
+        """Add x to the index of objects by name"""
+        self._name_index.setdefault(x.name, []).append(x)
 
     #%% Parts of the model
     def Const(self, value=0, name=None):
@@ -111,8 +164,9 @@ class GEKKO(object):
                 name = None
         if isinstance(value, (list,np.ndarray)):
             raise ValueError("Constant value must be scalar.")
-        const = GK_Operators(name,value)
+        const = GK_Constant(name,value)
         self._constants.append(const)
+        self._register(const)
         return const
 
     def Param(self, value=None, lb=None, ub=None, integer=False, name=None):
@@ -121,12 +175,13 @@ class GEKKO(object):
         are effectively constants unless the resulting .apm model is used later
         and the parameters can be set as MVs or FVs. """
         if name is not None:
-            name = re.sub(r'\W+', '_', name).lower()
+            name = _element_name(name)
         else:
             name = 'p' + str(len(self._parameters) + 1)
 
         parameter = GKParameter(name, value, lb, ub, integer)
         self._parameters.append(parameter)
+        self._register(parameter)
         return parameter
 
     def FV(self, value=None, lb=None, ub=None, integer=False, fixed_initial=True, name=None):
@@ -141,6 +196,7 @@ class GEKKO(object):
 
         parameter = GK_FV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
         self._parameters.append(parameter)
+        self._register(parameter)
         if fixed_initial is False:
             self.Connection(parameter,'calculated',pos1=1,node1=1)
         return parameter
@@ -156,6 +212,7 @@ class GEKKO(object):
 
         parameter = GK_MV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
         self._parameters.append(parameter)
+        self._register(parameter)
         if fixed_initial is False:
             self.Connection(parameter,'calculated',pos1=1,node1=1)
         return parameter
@@ -164,7 +221,7 @@ class GEKKO(object):
         """Calculated by solver to meet constraints (Equations). The number of
         variables (including CVs and SVs) must equal the number of equations."""
         if name is not None:
-            name = re.sub(r'\W+', '_', name).lower()
+            name = _element_name(name)
         else:
             name = 'v' + str(len(self._variables) + 1)
         if integer == True:
@@ -172,10 +229,30 @@ class GEKKO(object):
 
         variable = GKVariable(name, value, lb, ub)
         self._variables.append(variable)
+        self._register(variable)
         if fixed_initial is False:
             self.Connection(variable,'calculated',pos1=1,node1=1)
         return variable
 
+    def VarArray(self, shape, value=None, lb=None, ub=None, integer=False, name=None):
+        """Array of variables with the given shape (int or tuple). value, lb
+        and ub are numbers or arrays of that shape. The values and bounds are
+        kept in numpy arrays and the model declares the whole array at once
+        (name[1:n]), so this is much lighter than an Array of Vars for large
+        problems. x[i] is an element, x[a:b] and operators on the array give
+        numpy object arrays usable in m.Equation."""
+        if name is not None:
+            name = re.sub(r'\W+', '_', name).lower()
+        else:
+            name = 'va' + str(len(self._arrays) + 1)
+        if integer == True:
+            name = 'int_'+name
+
+        array = GKVarArray(name, shape, value, lb, ub)
+        self._arrays.append(array)
+        self._register(array)
+        return array
+
     def SV(self, value=None, lb=None, ub=None, integer=False, fixed_initial=True, name=None):
         """A variable that's special"""
         if name is not None:
@@ -187,6 +264,7 @@ class GEKKO(object):
 
         variable = GK_SV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
         self._variables.append(variable)
+        self._register(variable)
         if fixed_initial is False:
             self.Connection(variable,'calculated',pos1=1,node1=1)
         return variable
@@ -203,6 +281,7 @@ class GEKKO(object):
 
         variable = GK_CV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
         self._variables.append(variable)
+        self._register(variable)
         if fixed_initial is False:
             self.Connection(variable,'calculated',pos1=1,node1=1)
         return variable
@@ -214,10 +293,15 @@ class GEKKO(object):
                 name = None
         inter = GK_Intermediate(name)
         self._intermediates.append(inter)
-        self._inter_equations.append(str(equation))
+        self._register(inter)
+        if not isinstance(equation, GK_Operators):
+            equation = str(equation)
+        self._inter_equations.append(equation)
         return inter
 
     def Equation(self,equation):
+        if isinstance(equation, np.ndarray): #element-wise equations (VarArray)
+            equation = list(equation.flat)
         if (type(equation) is list) or (type(equation) is tuple):
             l = []
             for eq in equation:
@@ -237,13 +321,13 @@ class GEKKO(object):
         return l
 
     def Obj(self,obj):
-        self._objectives.append('minimize ' + str(obj))
+        self._objectives.append(GK_Expression('minimize',obj))
         
     def Minimize(self,obj):
-        self._objectives.append('minimize ' + str(obj))
+        self._objectives.append(GK_Expression('minimize',obj))
         
     def Maximize(self,obj):
-        self._objectives.append('maximize ' + str(obj))
+        self._objectives.append(GK_Expression('maximize',obj))
 
     def Raw(self,raw):
         self._raw.append(str(raw))
@@ -311,16 +395,16 @@ class GEKKO(object):
         if isinstance(var2,(int,float)):
             self._connections.append(var1_str + '=fixed')
             if pos1==None:
-               var1.__dict__['_override_csv'].append((0,var2))
+               var1.__dict__.setdefault('_override_csv',[]).append((0,var2))
             else:
                # catch case when 'end' is given as pos1 instead of an integer
                if pos1=='end':  # only override_csv if integer pos1
                   if self.time is not None:
-                     var1.__dict__['_override_csv'].append((len(self.time)-1,var2))
+                     var1.__dict__.setdefault('_override_csv',[]).append((len(self.time)-1,var2))
                   else:
                      print('Warning: Specify m.time before connecting to end node')
                else:
-                  var1.__dict__['_override_csv'].append((pos1,var2))    
+                  var1.__dict__.setdefault('_override_csv',[]).append((pos1,var2))    
 
     def fix(self,var, val=None, pos=None):
         '''Fix a variable at a specific value so that the solver cannot adjust the
@@ -1981,10 +2065,22 @@ class GEKKO(object):
         return y
 
     #%% Add array functionality to all types
-    def Array(self,f,dim,**args):
+    def Array(self,f,dim,indexed=False,**args):
         x = np.ndarray(dim,dtype=object)
-        for i in np.nditer(x, flags=["refs_ok"],op_flags=['readwrite']):
-            i[...] = f(**args)
+        if indexed and getattr(f, '__self__', None) is self and f.__name__ in ('Var','Param'):
+            #elements of Var and Param arrays are named name[1], name[2], ...
+            #(in C order) so the model file can declare them as name[1:n]
+            if args.get('name'):
+                base = re.sub(r'\W+', '_', args['name']).lower()
+            elif f.__name__ == 'Var':
+                base = 'v' + str(len(self._variables) + 1)
+            else:
+                base = 'p' + str(len(self._parameters) + 1)
+            for k, i in enumerate(np.nditer(x, flags=["refs_ok"],op_flags=['readwrite'])):
+                i[...] = f(**dict(args, name=_ElementName('%s[%d]' % (base, k+1))))
+        else:
+            for i in np.nditer(x, flags=["refs_ok"],op_flags=['readwrite']):
+                i[...] = f(**args)
         return x
     """
     #gives an array in a list instead of numpy ndarray
@@ -1997,12 +2093,13 @@ class GEKKO(object):
 
     #%% Import functions from other scripts
     from .gk_debug import gk_logic_tree, verify_input_options, like, name_check
-    from .gk_write_files import _write_solver_options, _generate_dbs_file, _write_info, _write_csv, _build_model
-    from .gk_post_solve import load_JSON, load_results
+    from .gk_write_files import _write_solver_options, _generate_dbs_file, _write_info, _write_csv, _build_model, _fingerprint, _extra_file_digests
+    from .gk_post_solve import load_JSON, load_results, _read_json
+    from .gk_batch import solve_batch
 
 
     #%% Get a solution
-    def solve(self,disp=True,debug=1,GUI=False,**kwargs):
+    def solve(self,disp=True,debug=1,GUI=False,profile=False,line_callback=None,**kwargs):
         """Solve the optimization problem.
 
         This function has these substeps:
@@ -2011,118 +2108,137 @@ class GEKKO(object):
         -Write options to dbs file
         -Solve the problem using the apm.exe commandline interface.
         -Load results into python variables.
+
+        The time, bytes written and read of each substep are recorded in
+        m.stats and printed with profile=True. line_callback, if given, is
+        called with each line of solver output as it arrives. A solve waits
+        for any other solve (solve_async, solve_batch) of the model to finish.
         """
+        with self._solve_lock:
+            self._solve(disp, debug, GUI, profile, line_callback, **kwargs)
+
+    def _solve(self,disp=True,debug=1,GUI=False,profile=False,line_callback=None,**kwargs):
         if 'remote' in kwargs:
             raise TypeError('"remote" argument has been moved to model initialization (GEKKO(remote=True))')
 
-        timing = False
-        if timing == True:
-            import time
-
-        if timing == True:
-            t = time.time()
-        # Build the model
+        stats = self.stats.start({'constants':len(self._constants), \
+                                  'parameters':len(self._parameters), \
+                                  'variables':len(self._variables), \
+                                  'variable arrays':len(self._arrays), \
+                                  'intermediates':len(self._intermediates), \
+                                  'equations':len(self._equations), \
+                                  'objectives':len(self._objectives), \
+                                  'connections':len(self._connections), \
+                                  'objects':len(self._objects)})
+
+        phase = stats.phase('build model')
+        # Build the model, unless its structure didn't change since the last solve
+        model_changed = True
         if self._model != 'provided': #no model was provided
-            self._build_model()
-        if timing == True:
-            print('build model', time.time() - t)
-
+            fingerprint = self._fingerprint()
+            if fingerprint != self._model_fingerprint \
+                    or not os.path.isfile(os.path.join(self._path,self._model_name+'.apm')):
+                self._build_model()
+                self._model_fingerprint = fingerprint
+            else:
+                model_changed = False
+        if model_changed:
+            self._options_synced = False
+            phase.wrote(os.path.join(self._path,self._model_name+'.apm'))
+        phase.done()
 
-        if timing == True:
-            t = time.time()
+        phase = stats.phase('build csv')
         if self._csv_status != 'provided':
             self._write_csv()
-        if timing == True:
-            print('build csv', time.time() - t)
+            phase.wrote(os.path.join(self._path,self._model_name+'.csv'))
+        phase.done()
 
-        if timing == True:
-            t = time.time()
+        phase = stats.phase('build dbs')
         self._generate_dbs_file()
-        if timing == True:
-            print('build dbs', time.time() - t)
+        phase.wrote(os.path.join(self._path,'measurements.dbs'))
+        phase.done()
 
-        if timing == True:
-            t = time.time()
-        self._write_solver_options()
-        if timing == True:
-            print('build solver options', time.time() - t)
+        phase = stats.phase('build solver options')
+        phase.bytes_written += len(self._write_solver_options() or '')
+        phase.done()
 
-        if timing == True:
-            t = time.time()
+        phase = stats.phase('write info')
+        info = self.options.CYCLECOUNT < 1
         self._write_info()
-        if timing == True:
-            print('write info', time.time() - t)
+        if info:
+            phase.wrote(os.path.join(self._path,self._model_name+'.info'))
+        phase.done()
 
         if debug >= 3:
             self.name_check()
 
+        #results of the previous solve are replaced
+        self._json_cache = {}
+
+        phase = stats.phase('solve')
         if self._remote == False: # local_solve
-            if timing == True:
-                t = time.time()
-                    
             # initialize printing
             outs = ''
             record_error = False
             apm_error = ''
-            sselect = False
+            streamed = False
 
             # Calls apmonitor through the command line
-            dirname = os.path.dirname(os.path.realpath(__file__))
             penv = {"PATH" : self._path }
-            if sys.platform=='win32' or sys.platform=='win64': # Windows 32 or 64 bit
-                apm_exe = os.path.join(dirname,'bin','apm.exe')
-                if not ipython:
-                    sselect = True  # set shell=False for IPython
-            elif sys.platform=='darwin': # MacOS
-                apm_exe = os.path.join(dirname,'bin','apm_mac')                
-            elif sys.platform=='linux' or sys.platform=='linux2': # Linux
-                if os.uname()[4].startswith("arm"): # ARM processor (Raspberry Pi)
-                    apm_exe = os.path.join(dirname,'bin','apm_arm')
-                else: # Other Linux
-                    apm_exe = os.path.join(dirname,'bin','apm')
-            else:
-                platform = 0
-                raise Exception('Platform '+sys.platform+' not supported for local solve, set remote=True')
-
-            app = subprocess.Popen([apm_exe, self._model_name], stdout=subprocess.PIPE, \
-                                   stderr=subprocess.PIPE, cwd = self._path, bufsize=4096, \
-                                   env = penv, universal_newlines=True, shell=sselect)
-
-            if debug<=1:
-                if ver == 2:  # Python 2 doesn't have timeout
-                    outs, errs = app.communicate()
-                else:  # Python 3+              
-                    # limit max time to 1e6
-                    max_time = min(1e6,self.options.max_time)
+            apm_exe, sselect = local_solver()
+
+            #solver output as it arrives
+            def on_line(line):
+                if disp == True:
                     try:
-                        outs, errs = app.communicate(timeout=max_time)
-                    except TimeoutExpired:
-                        app.kill()
-                        outs, errs = app.communicate()
-                        raise Exception('Time Limit Exceeded: ' + str(max_time))
+                        print(line)
+                    except:
+                        pass
+                if line_callback is not None:
+                    line_callback(line)
+
+            if self.worker_pool is not None:
+                #queue the solve for one of the workers
+                streamed = disp == True or line_callback is not None
+                job = self.worker_pool.submit([apm_exe, self._model_name], self._path, \
+                                              self._model_name, sselect, min(1e6,self.options.max_time), \
+                                              on_line if streamed else None)
+                outs, errs = job.result()
                 if '@error' in outs:
                     i = outs.find('@error')
                     apm_error = outs[i:]
                     record_error = True
             else:
-                # blocking if buffer fills up, use app.communicate instead
-                for line in iter(app.stdout.readline, ""):
-                    if disp == True:
+                app = subprocess.Popen([apm_exe, self._model_name], stdout=subprocess.PIPE, \
+                                       stderr=subprocess.PIPE, cwd = self._path, bufsize=4096, \
+                                       env = penv, universal_newlines=True, shell=sselect)
+
+                if debug<=1 and line_callback is None:
+                    if ver == 2:  # Python 2 doesn't have timeout
+                        outs, errs = app.communicate()
+                    else:  # Python 3+              
+                        # limit max time to 1e6
+                        max_time = min(1e6,self.options.max_time)
                         try:
-                            print(line.replace('\n', ''))
-                        except:
-                            pass
-                    # Start recording output if error is detected
-                    if '@error' in line:
+                            outs, errs = app.communicate(timeout=max_time)
+                        except TimeoutExpired:
+                            app.kill()
+                            outs, errs = app.communicate()
+                            raise Exception('Time Limit Exceeded: ' + str(max_time))
+                    if '@error' in outs:
+                        i = outs.find('@error')
+                        apm_error = outs[i:]
                         record_error = True
-                    if record_error:
-                        apm_error+=line
-                    app.wait()
-                outs, errs = app.communicate()
-
-            if timing == True:
-                print('solve', time.time() - t)
-            if disp == True:
+                else:
+                    streamed = True
+                    outs, errs = _stream(app, on_line, min(1e6,self.options.max_time))
+                    if '@error' in outs:
+                        i = outs.find('@error')
+                        apm_error = outs[i:]
+                        record_error = True
+
+            phase.bytes_read += len(outs)
+            if disp == True and not streamed:
                 print(outs)
             if errs:
                 print("Error:", errs)
@@ -2136,16 +2252,39 @@ class GEKKO(object):
                     with open(path) as f:
                         file = f.read()
                     cmd(self._server, self._model_name, extension+' '+file)
+                    phase.bytes_written += len(file)
 
 
-            #clear apm and csv files already on the server
-            cmd(self._server,self._model_name,'clear apm')
+            #solver options and extra files are appended to the model file
+            #on the server, so they are all sent again with the model, which
+            #is sent when any of them changed
+            extra_files = self._extra_file_digests()
+            upload = (self._model_fingerprint, tuple(self.solver_options), tuple(extra_files))
+            send_model = model_changed or upload != self._uploaded
+
+            #clear apm and csv files already on the server (the extra files
+            #are in the apm file, so they are cleared too)
+            if send_model:
+                self._uploaded = None
+                cmd(self._server,self._model_name,'clear apm')
             cmd(self._server,self._model_name,'clear csv')
 
-            #send model file
-            with open(os.path.join(self._path,self._model_name + '.apm')) as f:
-                model = f.read()
-            cmd(self._server, self._model_name, ' '+model)
+            #send model file with the solver options and extra files (eg
+            #cspline.data) appended, in one request
+            if send_model:
+                with open(os.path.join(self._path,self._model_name + '.apm')) as f:
+                    model = [f.read()]
+                #solver options
+                if self.solver_options:
+                    model.append(self._write_solver_options())
+                #extra files
+                for f_name, digest in extra_files:
+                    with open(os.path.join(self._path,f_name)) as f:
+                        extra_file_data = f.read() #read data
+                    model.append('File ' + f_name + '\n' + extra_file_data + 'End File \n') #format for appending to apm file
+                model = '\n'.join(model)
+                cmd(self._server, self._model_name, ' '+model)
+                phase.bytes_written += len(model)
             #send csv file
             send_if_exists('csv')
             #send info file
@@ -2154,25 +2293,26 @@ class GEKKO(object):
             with open(os.path.join(self._path,'measurements.dbs')) as f:
                 dbs = f.read()
             cmd(self._server, self._model_name, 'option '+dbs)
-            #solver options
-            if self.solver_options:
-                opt_file=self._write_solver_options()
-                cmd(self._server,self._model_name, ' '+opt_file)
-
-            #extra files (eg solver.opt, cspline.data)
-            for f_name in self._extra_files:
-                with open(os.path.join(self._path,f_name)) as f:
-                    extra_file_data = f.read() #read data
-                    extra_file_data = 'File ' + f_name + '\n' + extra_file_data + 'End File \n' #format for appending to apm file
-                cmd(self._server,self._model_name, ' '+extra_file_data)
-
-            #solve remotely
-            response = cmd(self._server, self._model_name, 'solve', disp, debug)
-            
+            phase.bytes_written += len(dbs)
+
+            #solve remotely; the solver output is streamed (and counted) line
+            #by line, the response only repeats the lines from @error on
+            streamed = [0]
+            def on_line(line):
+                streamed[0] += len(line) + 1
+                if line_callback is not None:
+                    line_callback(line)
+            response = cmd(self._server, self._model_name, 'solve', disp, debug, on_line)
+            phase.bytes_read += streamed[0]
+
             #print APM error message and die
             if (debug >= 1) and ('@error' in response):
                 raise Exception(response)
 
+            #the server has the model and extra files once a solve used them
+            if send_model and '@error' not in response:
+                self._uploaded = upload
+
             #load results
             def byte2str(byte):
                 if type(byte) is bytes:
@@ -2180,57 +2320,83 @@ class GEKKO(object):
                 else:
                     return byte
 
+            filenames = ['results.json','options.json']
+            if self.options.CSV_WRITE >= 1:
+                filenames.append('results.csv')
+                if self.options.CSV_WRITE >1:
+                    filenames.append('results_all.csv')
             try:
-                results = byte2str(get_file(self._server,self._model_name,'results.json'))
-                f = open(os.path.join(self._path,'results.json'), 'w')
-                f.write(str(results))
-                f.close()
-                options = byte2str(get_file(self._server,self._model_name,'options.json'))
-                f = open(os.path.join(self._path,'options.json'), 'w')
-                f.write(str(options))
-                f.close()
-                if self.options.CSV_WRITE >= 1:
-                    results = byte2str(get_file(self._server,self._model_name,'results.csv'))
-                    with open(os.path.join(self._path,'results.csv'), 'w') as f:
-                        f.write(str(results))
-                    if self.options.CSV_WRITE >1:
-                        results_all = byte2str(get_file(self._server,self._model_name,'results_all.csv'))
-                        with open(os.path.join(self._path,'results_all.csv'), 'w') as f:
-                            f.write(str(results_all))
+                #the IP address (folder of the application on the server)
+                #is looked up once per model
+                if self._ip is None:
+                    self._ip = get_ip(self._server)
+                files = get_files(self._server,self._model_name,filenames,self._ip)
+                for f_name in filenames:
+                    with open(os.path.join(self._path,f_name), 'w') as f:
+                        f.write(str(byte2str(files[f_name])))
             except:
+                #look up the IP address again next time, in case it changed
+                self._ip = None
                 raise ImportError('No solution or server unreachable.\n'+\
                                   '  Show errors with m.solve(disp=True).\n'+\
                                   '  Try local solve with m=GEKKO(remote=False).')
+            #only the files downloaded by this solve (others may be left
+            #from earlier solves)
+            for f_name in filenames:
+                phase.read(os.path.join(self._path,f_name))
+        phase.done()
 
-        if timing == True:
-            print('solve', time.time() - t)
-
-        if timing == True:
-            t = time.time()
+        phase = stats.phase('load results')
         self.load_results()
-        if timing == True:
-            print('load results', time.time() - t)
+        phase.read(os.path.join(self._path,'results.json'))
+        phase.done()
 
-        if timing == True:
-            t = time.time()
+        phase = stats.phase('load JSON')
         self.load_JSON()
-        if timing == True:
-            print('load JSON', time.time() - t)
+        phase.read(os.path.join(self._path,'options.json'))
+        phase.done()
+
+        #the next measurements.dbs only needs options changed after this solve
+        if self.options.APPSTATUS == 1:
+            self._options_synced = True
+            self.options._dirty.clear()
+            for vp in self._parameters+self._variables:
+                vp._clean()
 
-        if timing == True:
-            t = time.time()
         if debug >= 3:
+            phase = stats.phase('debug')
             self.verify_input_options()
             self.gk_logic_tree()
-        if timing == True:
-            print('debug', time.time() - t)
+            phase.done()
+
+        if profile:
+            print(stats.report())
 
         if self._gui_open:
-            self.gui.update()
+            self.gui.update(self._read_json('options.json'), self._read_json('results.json'))
         elif GUI is True:
+            from .gk_gui import GK_GUI #flask is only loaded for the GUI
             self._gui_open = True
             self.gui = GK_GUI(self._path)
-            self.gui.display()
+            self.gui.display(self._read_json('options.json'), self._read_json('results.json'))
+
+    def solve_async(self,disp=False,debug=1,line_callback=None,**kwargs):
+        """Solve the optimization problem in the background.
+
+        Returns a concurrent.futures.Future that completes once the results
+        are loaded into the model; its result is the model and solve errors
+        are raised by Future.result(). Solves of the same model run one at a
+        time. Background solves of all models share one pool of threads and
+        use the same local (worker_pool) or remote path as solve(). In
+        asyncio code, await asyncio.wrap_future(m.solve_async()).
+        line_callback is called (on the background thread) with each line of
+        solver output as it arrives.
+        """
+        return async_executor().submit(self._solve_async_job, disp, debug, line_callback, kwargs)
+
+    def _solve_async_job(self, disp, debug, line_callback, kwargs):
+        self.solve(disp=disp, debug=debug, line_callback=line_callback, **kwargs)
+        return self
 
     #%% Name matching
     
@@ -2251,6 +2417,10 @@ class GEKKO(object):
                     if isinstance(list_var[i], GK_Operators):
                         list_var[i].__dict__['name'] = re.sub(r'\W+', '_', var).lower()+'['+str(i)+']'
                         print('Found ' + var+'['+str(i)+']')
+        #names changed, rebuild the index
+        self._name_index = {}
+        for x in self._constants+self._parameters+self._variables+self._arrays+self._intermediates:
+            self._register(x)
 
 
     def open_folder(self):
@@ -2312,45 +2482,46 @@ class GEKKO(object):
     #  tan(x) tangent
     #  tanh(x) hyperbolic tangent
     def abs(self,other):
-        return GK_Operators('abs('+str(other) + ')')
+        return GK_Expression('abs',other)
     def acos(self,other):
-        return GK_Operators('acos('+str(other) + ')')
+        return GK_Expression('acos',other)
     def acosh(self,other):
-        return GK_Operators('acosh('+str(other) + ')')
+        return GK_Expression('acosh',other)
     def asin(self,other):
-        return GK_Operators('asin('+str(other) + ')')
+        return GK_Expression('asin',other)
     def asinh(self,other):
-        return GK_Operators('asinh('+str(other) + ')')
+        return GK_Expression('asinh',other)
     def atan(self,other):
-        return GK_Operators('atan('+str(other) + ')')
+        return GK_Expression('atan',other)
     def atanh(self,other):
-        return GK_Operators('atanh('+str(other) + ')')
+        return GK_Expression('atanh',other)
     def cos(self,other):
-        return GK_Operators('cos(' + str(other) + ')')
+        return GK_Expression('cos',other)
     def cosh(self,other):
-        return GK_Operators('cosh(' + str(other) + ')')
+        return GK_Expression('cosh',other)
     def erf(self,other):
-        return GK_Operators('erf('+str(other) + ')')
+        return GK_Expression('erf',other)
     def erfc(self,other):
-        return GK_Operators('erfc('+str(other) + ')')
+        return GK_Expression('erfc',other)
     def exp(self,other):
-        return GK_Operators('exp(' + str(other) + ')')
+        return GK_Expression('exp',other)
     def log(self,other):
-        return GK_Operators('log('+str(other) + ')')
+        return GK_Expression('log',other)
     def log10(self,other):
-        return GK_Operators('log10('+str(other) + ')')
+        return GK_Expression('log10',other)
     def sin(self,other):
-        return GK_Operators('sin(' + str(other) + ')')
+        return GK_Expression('sin',other)
     def sinh(self,other):
-        return GK_Operators('sinh(' + str(other) + ')')
+        return GK_Expression('sinh',other)
     def sqrt(self,other):
-        return GK_Operators('sqrt('+str(other) + ')')
+        return GK_Expression('sqrt',other)
     def tan(self,other):
-        return GK_Operators('tan(' + str(other) + ')')
+        return GK_Expression('tan',other)
     def tanh(self,other):
-        return GK_Operators('tanh(' + str(other) + ')')
+        return GK_Expression('tanh',other)
 
     def GUI(self):
         if not self._gui_open:
+            from .gk_gui import GK_GUI #flask is only loaded for the GUI
             self.gui = GK_GUI(self._path)
             self.gui.display()
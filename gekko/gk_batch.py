@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .apm import cmd, get_file, get_ip
+from .gk_parameter import GKParameter
+from .gk_variable import GKVariable
+from .gk_pool import SolverPool, local_solver
+from .gk_post_solve import _parse_json
+
+
+#%% Batch (scenario) solves
+
+def solve_batch(self, param_sets, workers=None, disp=False):
+    """Solve the model for many sets of parameter values (scenarios).
+
+    The model, info, option and solver option files are written (and the
+    model validated) once. Each scenario gets a copy of them in its own
+    folder together with its own csv file, and the scenarios are solved in
+    parallel: local solves run on the worker_pool of the model (or on
+    `workers` solver processes), remote solves use one application on the
+    server per scenario. The values of the model are left as they were. The
+    batch waits for any other solve (solve, solve_async) of the model.
+
+    param_sets: list with a {parameter: value} dictionary (or a list of
+        (parameter, value) pairs) per scenario. Parameters are GEKKO objects
+        or their names and values are scalars or arrays like parameter.value
+    workers: number of scenarios solved at the same time (default: worker
+        pool of the model or number of CPUs)
+
+    Returns:
+        dict of name -> array with one row per scenario (nan for scenarios
+        that failed) and 'APPSTATUS' (1 solved, 0 failed) for each scenario
+    """
+    with self._solve_lock:
+        return _solve_batch(self, param_sets, workers, disp)
+
+
+def _solve_batch(self, param_sets, workers, disp):
+    #scenario values
+    scenarios = []
+    for params in param_sets:
+        values = []
+        if hasattr(params, 'items'):
+            params = params.items()
+        for vp, value in params:
+            #a name stands for all parameters and variables of that name
+            if isinstance(vp, (str, type(u''))):
+                matches = self._name_index.get(vp.lower(), [])
+            else:
+                matches = [x for x in self._name_index.get(vp.name, []) if x is vp]
+            matches = [x for x in matches if isinstance(x, (GKParameter, GKVariable))]
+            if not matches:
+                raise ValueError(str(vp)+' is not a parameter or variable of this model')
+            values.extend((x, value) for x in matches)
+        scenarios.append(values)
+
+    #build and validate the model once
+    if self._model != 'provided':
+        fingerprint = self._fingerprint()
+        if fingerprint != self._model_fingerprint \
+                or not os.path.isfile(os.path.join(self._path,self._model_name+'.apm')):
+            self._build_model()
+            self._model_fingerprint = fingerprint
+    self._write_info()
+    #each scenario starts without an application database: write all options
+    synced = self._options_synced
+    self._options_synced = False
+    self._generate_dbs_file()
+    self._options_synced = synced
+    opt_file = self._write_solver_options()
+
+    base = self._path
+    skip = set([self._model_name+'.csv', 'results.json', 'options.json', \
+                'results.csv', 'results_all.csv'])
+    files = [f for f in os.listdir(base) if f not in skip and os.path.isfile(os.path.join(base,f))]
+    root = tempfile.mkdtemp(suffix=self._model_name+'_batch')
+
+    #write a folder and csv file per scenario
+    saved = [(vp, vp.VALUE.value, copy.copy(vp.VALUE.change), vp.__dict__.get('MEAS'), \
+              copy.copy(vp.__dict__.get('_dirty'))) \
+             for vp in self._parameters+self._variables]
+    paths = []
+    try:
+        for i, values in enumerate(scenarios):
+            path = os.path.join(root, str(i))
+            os.mkdir(path)
+            for f in files:
+                shutil.copy(os.path.join(base,f), path)
+            _restore(saved)
+            for vp, value in values:
+                vp.VALUE = value
+            self._path = path
+            if self._csv_status != 'provided':
+                self._write_csv()
+            paths.append(path)
+    finally:
+        self._path = base
+        _restore(saved)
+
+    #solve all scenarios
+    ok = [False]*len(paths)
+    try:
+        if self._remote:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=workers or multiprocessing.cpu_count())
+            if self._ip is None:
+                self._ip = get_ip(self._server)
+            jobs = [executor.submit(_solve_remote, self._server, self._model_name+'_'+str(i), \
+                                    path, self._model_name, opt_file, \
+                                    [os.path.basename(f) for f in self._extra_files], disp, self._ip) \
+                    for i, path in enumerate(paths)]
+            executor.shutdown(wait=False)
+        else:
+            if workers is None and self.worker_pool is not None:
+                pool = self.worker_pool
+            else:
+                pool = SolverPool(workers or multiprocessing.cpu_count())
+            apm_exe, sselect = local_solver()
+            jobs = [pool.submit([apm_exe, self._model_name], path, self._model_name+'_'+str(i), \
+                                sselect, min(1e6,self.options.MAX_TIME)) \
+                    for i, path in enumerate(paths)]
+            if pool is not self.worker_pool:
+                pool.shutdown(wait=False)
+
+        for i, job in enumerate(jobs):
+            try:
+                outs = job.result()
+                if not self._remote:
+                    outs = outs[0]
+                    if disp:
+                        print(outs)
+                if '@error' in outs:
+                    raise Exception(outs[outs.find('@error'):])
+                ok[i] = True
+            except Exception as e:
+                print('Scenario '+str(i)+' failed: '+str(e))
+
+        #stack the results of all scenarios
+        data = [_parse_json(os.path.join(path,'results.json')) if ok[i] \
+                and os.path.isfile(os.path.join(path,'results.json')) else None \
+                for i, path in enumerate(paths)]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    results = {}
+    for d in data:
+        if d is None:
+            continue
+        for name in d:
+            if name not in results:
+                rows = [np.array(r[name], dtype=np.float64) if r is not None and name in r else None \
+                        for r in data]
+                shape = next(r.shape for r in rows if r is not None)
+                results[name] = np.array([r if r is not None else np.full(shape, np.nan) \
+                                          for r in rows])
+    results['APPSTATUS'] = np.array([1 if d is not None else 0 for d in data])
+    return results
+
+
+def _restore(saved):
+    """Put back the values (and change flags), measurements and options
+    changed since the last solve of all parameters and variables"""
+    for vp, value, change, meas, dirty in saved:
+        vp.VALUE.value = value
+        vp.VALUE.change = change
+        if meas is not None:
+            vp.__dict__['MEAS'] = meas
+        #writing the csv file resets MEAS, which marks it as changed
+        if dirty is None:
+            vp.__dict__.pop('_dirty', None)
+        else:
+            vp.__dict__['_dirty'] = copy.copy(dirty)
+
+
+def _solve_remote(server, app, path, model_name, opt_file, extra_files, disp, ip):
+    """Send the files of one scenario to the server as application app,
+    solve and download results.json. The application is cleared from the
+    server afterwards. Returns the solver output"""
+    def read(filename):
+        with open(os.path.join(path,filename)) as f:
+            return f.read()
+
+    cmd(server, app, 'clear all')
+    model = [read(model_name+'.apm')]
+    if opt_file:
+        model.append(opt_file)
+    for f_name in extra_files:
+        model.append('File '+f_name+'\n'+read(f_name)+'End File \n')
+    cmd(server, app, ' '+'\n'.join(model))
+    for extension in ('csv','info'):
+        if os.path.isfile(os.path.join(path,model_name+'.'+extension)):
+            cmd(server, app, extension+' '+read(model_name+'.'+extension))
+    cmd(server, app, 'option '+read('measurements.dbs'))
+
+    try:
+        response = cmd(server, app, 'solve', disp)
+        if '@error' not in response:
+            results = get_file(server, app, 'results.json', ip)
+            if type(results) is bytes:
+                results = results.decode().replace('\r','')
+            with open(os.path.join(path,'results.json'), 'w') as f:
+                f.write(str(results))
+    finally:
+        cmd(server, app, 'clear all')
+    return response
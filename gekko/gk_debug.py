@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
 
 from .properties import parameter_options, variable_options
 
@@ -89,9 +88,7 @@ def like(self,one,two):
 
 def verify_input_options(self):
     ## Load data
-    f = open(os.path.join(self.path,'options.json'))
-    data = json.load(f)
-    f.close()
+    data = self._read_json('options.json')
     ## Global Options
     for o in self.options._input_option_list: #for each global input option
         if o == 'CSV_READ' and self.csv_status == 'none':
@@ -103,14 +100,14 @@ def verify_input_options(self):
         if vp.type != None: #(FV/MV/SV/CV) not Param or Var
             for o in parameter_options[vp.type]['inputs']:
                 if o not in ['LB','UB']: #TODO: for o in data[vp.name] to avoid this check
-                    if vp.__dict__[o] is not None and not self.like(vp.__dict__[o], data[vp.name][o]):
+                    if getattr(vp,o) is not None and not self.like(getattr(vp,o), data[vp.name][o]):
                         print(str(vp)+'.'+str(o)+" was not written correctly") #give message if they don't match
 
     for vp in self._variables:
         if vp.type != None: #(FV/MV/SV/CV) not Param or Var
             for o in variable_options[vp.type]['inputs']:
                 if o not in ['LB','UB']:
-                    if vp.__dict__[o] is not None and not self.like(vp.__dict__[o], data[vp.name][o]):
+                    if getattr(vp,o) is not None and not self.like(getattr(vp,o), data[vp.name][o]):
                         print(str(vp)+'.'+str(o)+" was not written correctly") #give message if they don't match
                         
 #%% Name Check
@@ -40,6 +40,7 @@ class GKGlobalOptions():
         self._input_option_list = global_options_inputs
         self._output_option_list = global_options_outputs
         self._inout_option_list = global_options_inout
+        self._dirty = set()
 
         # set defaults for all global options
         #inputs 
@@ -111,9 +112,11 @@ class GKGlobalOptions():
         # now allow options to be sent to the server
         self._initialized = True
 
-    def getOverridesString(self):
+    def getOverridesString(self, changed_only=False):
         ''' Returns string to go in dbs file
 
+            changed_only: only options set since the last successful solve
+
             Example return value:
                 NLC.APPINFO = 0
                 APPINFOCHG  = 0
@@ -123,6 +126,8 @@ class GKGlobalOptions():
         result = ''
 
         for attr, value in self.__dict__.items():
+            if changed_only and attr not in self._dirty:
+                continue
             # If the attribute is in the list of exceptions, do not print
             if(attr in global_options_inputs+global_options_inout):
                 result = result + "APM." + attr + " = " + str(value) + "\n"
@@ -144,6 +149,8 @@ class GKGlobalOptions():
             #only allow user to set input or input/output options:
             if name in global_options_inputs+global_options_inout:
                 self.__dict__[name] = value
+                #options changed since the last successful solve
+                self._dirty.add(name)
                     
             #don't allow writing to output properties by default
             elif name in global_options_outputs:
@@ -60,7 +60,7 @@ class FlaskThread(threading.Thread):
     Flask API thread. Pulls the required data from options.json and
     results.json and displays by opening the local browser to the Vue app.
     """
-    def __init__(self, path, debug, port):
+    def __init__(self, path, debug, port, options=None, results=None):
         threading.Thread.__init__(self)
         self.history_horizon = 5     # History horizon that will be displayed on the plot
         self.has_data = False        # Variable defines if the Gekko data is loaded
@@ -74,21 +74,27 @@ class FlaskThread(threading.Thread):
         self.results = {}            # Dict loaded from results.json
 
         self.vars_dict = {}          # vars dict with script names as keys
+        self.vars_index = {}         # entries of gekko_data['vars'] by name
         self.make_vars_map()         # sets map of script names to apmonitor names
         self.options_dict = {}       # options dict with script names as keys
         self.model = {}              # APM model information
         self.info = {}
-        self.get_script_data()
+        self.get_script_data(options, results)
         self.has_data = True
 
         # This is used for tvars_maphe polling between the api and the Vue app
         self.alarm = threading.Timer(WATCHDOG_TIME_LENGTH, watchdog_timer)
 
+    def add_var_dict(self, kind, var_dict):
+        """Add a series to gekko_data['vars'][kind] and index it by name"""
+        self.gekko_data['vars'][kind].append(var_dict)
+        self.vars_index[var_dict['name']] = var_dict
+
     # Parameters require a little special handling, only called from get_var_from_main
     def get_parameter_from_main(self, param):
         """Special handling for GK_Parameters"""
         main_dict = vars(main)
-        data = list(filter(lambda d: d['name'] == param, self.gekko_data['vars']['parameters']))[0]
+        data = self.vars_index[param]
         try:
             data['data'] = self.results[main_dict[param].name]
             data['x'] = self.results['time']
@@ -102,7 +108,7 @@ class FlaskThread(threading.Thread):
 
         ## historical data
         if isinstance(main_dict[param], (GK_MV, GK_FV)):
-            data_hist = list(filter(lambda d: d['name'] == param + '_hist', self.gekko_data['vars']['parameters']))[0]
+            data_hist = self.vars_index[param + '_hist']
             data_hist['data'] = data_hist['data'] + [self.results[main_dict[param].name][0]]
             timestep = self.results['time'][1] - self.results['time'][0]
             data_hist['x'] = [data_hist['x'][0] - timestep] + data_hist['x']
@@ -117,19 +123,17 @@ class FlaskThread(threading.Thread):
         if isinstance(main_dict[variable], (GK_CV, GK_SV)):
             if main_dict[variable].name + '.bcv' in self.results:
                 #biased history
-                var_hist_bias = list(filter(
-                    lambda d: d['name'] == variable + '_hist(bias)', self.gekko_data['vars']['variables']))[0]
+                var_hist_bias = self.vars_index[variable + '_hist(bias)']
                 var_hist_bias['data'] = var_hist_bias['data'] + [self.results[main_dict[variable].name + '.bcv'][0]] #store data value
                 var_hist_bias['x'] = [var_hist_bias['x'][0] - timestep] + var_hist_bias['x']    #update time array
                 #unbiased history
-                var_hist_nobias = list(filter(
-                    lambda d: d['name'] == variable + '_hist(nobias)', self.gekko_data['vars']['variables']))[0]
+                var_hist_nobias = self.vars_index[variable + '_hist(nobias)']
                 var_hist_nobias['data'] = var_hist_nobias['data'] + [self.results[main_dict[variable].name][0]] #store data value
                 var_hist_nobias['x'] = [var_hist_nobias['x'][0] - timestep] + var_hist_nobias['x']    #update time array
             
         
         ## Plot prediction from current solve
-        var = list(filter(lambda d: d['name'] == variable, self.gekko_data['vars']['variables']))[0]
+        var = self.vars_index[variable]
         try:
             if isinstance(main_dict[variable], (GK_CV, GK_SV)):
                 if main_dict[variable].name + '.bcv' in self.results:
@@ -137,8 +141,7 @@ class FlaskThread(threading.Thread):
                     var['x'] = self.results['time']
                     var['options'] = self.options[main_dict[variable].name]
                     
-                    var_nobias = list(filter(
-                    lambda d: d['name'] == variable + '(nobias)', self.gekko_data['vars']['variables']))[0]
+                    var_nobias = self.vars_index[variable + '(nobias)']
                     var_nobias['data'] = self.results[main_dict[variable].name]
                     var_nobias['x'] = self.results['time']
                 
@@ -159,18 +162,18 @@ class FlaskThread(threading.Thread):
             
             
         if main_dict[variable].name + '.tr_hi' in self.results:
-            data = list(filter(lambda d: d['name'] == variable + '(Tr_hi)', self.gekko_data['vars']['variables']))[0]
+            data = self.vars_index[variable + '(Tr_hi)']
             # Replace the list entirely as we want a new trajectory for each solve
             data['data'] = self.results[main_dict[variable].name + '.tr_hi']
             data['x'] = self.results['time']
         if main_dict[variable].name + '.tr_lo' in self.results:
-            data = list(filter(lambda d: d['name'] == variable + '(Tr_lo)', self.gekko_data['vars']['variables']))[0]
+            data = self.vars_index[variable + '(Tr_lo)']
             # Replace the list entirely as we want a new trajectory for each solve
             data['data'] = self.results[main_dict[variable].name + '.tr_lo']
             data['x'] = self.results['time']
             
         if main_dict[variable].name + '.tr' in self.results:
-            data = list(filter(lambda d: d['name'] == variable + '(Tr)', self.gekko_data['vars']['variables']))[0]
+            data = self.vars_index[variable + '(Tr)']
             # Replace the list entirely as we want a new trajectory for each solve
             data['data'] = self.results[main_dict[variable].name + '.tr']
             data['x'] = self.results['time']
@@ -203,37 +206,37 @@ class FlaskThread(threading.Thread):
                     'options': options
                 }
             if isinstance(main_dict[var], GKVariable):
-                self.gekko_data['vars']['variables'].append(var_dict)
+                self.add_var_dict('variables', var_dict)
                 if main_dict[var].name + '.tr_hi' in self.results:
                     d = var_dict.copy() 
                     d['name'] = var + '(Tr_hi)'
-                    self.gekko_data['vars']['variables'].append(d)
+                    self.add_var_dict('variables', d)
                 if main_dict[var].name + '.tr_lo' in self.results:
                     d = var_dict.copy()
                     d['name'] = var + '(Tr_lo)'
-                    self.gekko_data['vars']['variables'].append(d) 
+                    self.add_var_dict('variables', d) 
                 if main_dict[var].name + '.tr' in self.results:
                     d = var_dict.copy()
                     d['name'] = var + '(Tr)'
-                    self.gekko_data['vars']['variables'].append(d) 
+                    self.add_var_dict('variables', d) 
                 if main_dict[var].name + '.bcv' in self.results:
                     d1 = var_dict.copy()
                     d1['name'] = var + '_hist(bias)'
-                    self.gekko_data['vars']['variables'].append(d1)
+                    self.add_var_dict('variables', d1)
                     d2 = var_dict.copy()
                     d2['name'] = var + '_hist(nobias)'
-                    self.gekko_data['vars']['variables'].append(d2)
+                    self.add_var_dict('variables', d2)
                     d3 = var_dict.copy()
                     d3['name'] = var + '(nobias)'
-                    self.gekko_data['vars']['variables'].append(d3)
+                    self.add_var_dict('variables', d3)
             elif isinstance(main_dict[var], GKParameter):
-                self.gekko_data['vars']['parameters'].append(var_dict)
+                self.add_var_dict('parameters', var_dict)
                 if isinstance(main_dict[var], (GK_MV, GK_FV)):
                     d = var_dict.copy()
                     d['name'] = var + '_hist'
-                    self.gekko_data['vars']['parameters'].append(d)
+                    self.add_var_dict('parameters', d)
             elif isinstance(main_dict[var], GK_Intermediate):
-                self.gekko_data['vars']['intermediates'].append(var_dict)
+                self.add_var_dict('intermediates', var_dict)
 
         # Update the variable if the data has been loaded before
         data = False
@@ -244,7 +247,7 @@ class FlaskThread(threading.Thread):
             self.get_parameter_from_main(var)
             return
         elif isinstance(main_dict[var], GK_Intermediate):
-            data = list(filter(lambda d: d['name'] == var, self.gekko_data['vars']['intermediates']))[0]
+            data = self.vars_index[var]
         try:
             data['data'] = data['data'] + [self.results[main_dict[var].name][0]]
             data['options'] = self.options[main_dict[var].name]
@@ -288,16 +291,24 @@ class FlaskThread(threading.Thread):
                         # Some vars are not in options.json, but only have values in results.json
                         pass
 
-    def get_script_data(self):
+    def load_data(self, options=None, results=None):
+        """Use the options and results already parsed by the model, or load
+        them from options.json and results.json"""
+        if options is None:
+            options = json.loads(open(os.path.join(self.path,'options.json')).read())
+        if results is None:
+            results = json.loads(open(os.path.join(self.path,"results.json")).read())
+        self.options = options
+        self.results = results
+
+    def get_script_data(self, options=None, results=None):
         """Gather the data that GEKKO returns from the run and process it into
         the objects that the GUI can handle. Only run on initialization"""
         # When calling `m.solve()` in a loop the Gui will be initialized before
         # `m.solve()` is ever called, so the files might not be there.
         try:
-            # Load options.json
-            self.options = json.loads(open(os.path.join(self.path,'options.json')).read())
-            # Load results.json
-            self.results = json.loads(open(os.path.join(self.path,"results.json")).read())
+            # Load options.json and results.json
+            self.load_data(options, results)
             self.gekko_data['model'] = self.options['APM']
             self.gekko_data['info'] = self.options['INFO']
             self.gekko_data['time'] = self.results['time']
@@ -306,6 +317,7 @@ class FlaskThread(threading.Thread):
             self.gekko_data['vars']['parameters'] = []
             self.gekko_data['vars']['constants'] = []
             self.gekko_data['vars']['intermediates'] = []
+            self.vars_index = {}
 
             self.vars_dict['time'] = self.results['time']
             self.model = self.options['APM']
@@ -403,13 +415,11 @@ class FlaskThread(threading.Thread):
                 if len(var) >= self.history_horizon:
                     self.gekko_data['vars'][var_list][var] = self.gekko_data['vars'][var_list][var][-self.history_horizon:]
 
-    def update(self):
+    def update(self, options=None, results=None):
         """Handle updated solution results"""
         try:
-            # Load options.json
-            self.options = json.loads(open(os.path.join(self.path,'options.json')).read())
-            # Load results.json
-            self.results = json.loads(open(os.path.join(self.path,"results.json")).read())
+            # Load options.json and results.json
+            self.load_data(options, results)
         except Exception as e:
             raise e
         # Updates the options_dict
@@ -444,8 +454,9 @@ class GK_GUI:
     def __init__(self, path):
         self.path = path
 
-    def display(self):
-        """Finds the appropriate port starts the api and opens the webbrowser"""
+    def display(self, options=None, results=None):
+        """Finds the appropriate port starts the api and opens the webbrowser.
+        options and results are the parsed solution files, if available"""
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # It is necessary to have a reference like this as flaskThread cannot
         # be part of self when `flaskThread.start()` is called for reasons I
@@ -468,24 +479,24 @@ class GK_GUI:
         print('Opening display in default webbrowser at http://localhost:' + str(port) + '/index.html. \nClose display tab or type CTRL+C to exit.')
         if DEV:
             print('Starting Flask Thread on port {}'.format(8050))
-            flaskThread = FlaskThread(self.path, True, 8050)
+            flaskThread = FlaskThread(self.path, True, 8050, options, results)
             # flaskThread.daemon = True
             flaskThread.start()
             self.apiRef = flaskThread
         else:
             print('Starting Flask Thread on port {}'.format(port))
             webbrowser.open("http://localhost:" + str(port) + "/index.html")
-            flaskThread = FlaskThread(self.path, False, port)
+            flaskThread = FlaskThread(self.path, False, port, options, results)
             # flaskThread.daemon = True
             flaskThread.start()
             self.apiRef = flaskThread
             # Non-threaded way, only works for non-dynamic GUI display
             # app.run(debug=False, port=port)
 
-    def update(self):
+    def update(self, options=None, results=None):
         """Alert the API of new solution results"""
         if DEV:
             print('Handling update')
-        self.apiRef.update()
+        self.apiRef.update(options, results)
 
     
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
+import numbers
 import numpy as np
 """This class enables operator overloading for turning python equations into
 strings for the .apm model. Each variable type inherits this class. Operations 
 done on an instance of this class return a new instance to enable chained 
 operations."""
-class GK_Operators:
+class GK_Operators(object):
     """"""
+    #no per-instance storage here: expression nodes only keep their slots,
+    #named objects (GK_Constant, variables, ...) have a __dict__
+    __slots__ = ()
     count = 0
     
     def __init__(self, name, value=None):                
@@ -27,56 +31,70 @@ class GK_Operators:
         return self.value[key]
     #make attributes case in-sensitive for reading too
     # (this is inherited by variables and paramters)
+    #options that were never set are read from the defaults shared by the
+    #class (eg GK_FV.STATUS) instead of being stored in every object
     def __getattr__(self,name):
-        if name.upper() in self.__dict__:
-            return self.__dict__[name.upper()]
-        elif name.lower() in self.__dict__:
-            return self.__dict__[name.lower()]
-        else: 
+        try:
+            d = object.__getattribute__(self, '__dict__')
+        except AttributeError: #expression nodes
+            d = {}
+        if name.upper() in d:
+            return d[name.upper()]
+        elif name.lower() in d:
+            return d[name.lower()]
+        try:
+            return getattr(type(self), name.upper())
+        except AttributeError:
             raise AttributeError(name)
     #%%Operator overloading for building functions
+    #each operation returns an expression node (GK_Expression) that only
+    #keeps references to its operands; the model text is rendered later
+    #+,- and *,/ chains are collected in flat (n-ary) sum and product nodes
     #comparisons
     def __lt__(self,other): #less than
-        return GK_Operators(str(self) + '<' + str(other))
+        return GK_Expression('<',self,other)
     def __le__(self,other): #less than or equal to
-        return GK_Operators(str(self) + '<=' + str(other))
+        return GK_Expression('<=',self,other)
     def __gt__(self,other): #greater than
-        return GK_Operators(str(self) + '>' + str(other))
+        return GK_Expression('>',self,other)
     def __ge__(self,other): #greater than or equal to
-        return GK_Operators(str(self) + '>=' + str(other))
+        return GK_Expression('>=',self,other)
     def __eq__(self,other): #equal ==
-        return GK_Operators(str(self) + '=' + str(other))
+        return GK_Expression('=',self,other)
+    #== builds an equation, so objects are hashed (eg as dictionary keys) by identity
+    def __hash__(self):
+        return id(self)
     #math operators
     def __add__(self,other): # +
-        return GK_Operators('(' + str(self) + '+' + str(other) + ')')
+        return _chain('+',self,other)
     def __sub__(self,other): # -
-        return GK_Operators('(' + str(self) + '-' + str(other) + ')')
+        return _chain('-',self,other)
     def __pow__(self,other): # **
-        return GK_Operators('((' + str(self) + ')^(' + str(other) + '))')
+        return GK_Expression('^',self,other)
     def __div__(self,other): # /
-        return GK_Operators('((' + str(self) + ')/(' + str(other) + '))')
+        return _chain('/',self,other)
     def __truediv__(self,other): # /
-        return GK_Operators('((' + str(self) + ')/(' + str(other) + '))')
+        return _chain('/',self,other)
     def __mul__(self,other): # *
-        return GK_Operators('((' + str(self) + ')*(' + str(other) + '))')
+        return _chain('*',self,other)
     def __neg__(self): #-x
-        return GK_Operators('(-'+str(self)+')')
+        return GK_Expression('neg',self)
     # reverse math    
     def __radd__(self,other): # +
-        return GK_Operators('(' + str(other) + '+' + str(self) + ')')
+        return _chain('+',other,self)
     def __rsub__(self,other): # -
-        return GK_Operators('(' + str(other) + '-' + str(self) + ')')
+        return _chain('-',other,self)
     def __rpow__(self,other): # **
-        return GK_Operators('(' + str(other) + '^' + str(self) + ')')
+        return GK_Expression('^',other,self)
     def __rdiv__(self,other): # /
-        return GK_Operators('(' + str(other) + '/' + str(self) + ')')
+        return _chain('/',other,self)
     def __rtruediv__(self,other): # /
-        return GK_Operators('(' + str(other) + '/' + str(self) + ')')
+        return _chain('/',other,self)
     def __rmul__(self,other): # *
-        return GK_Operators('((' + str(other) + ')*(' + str(self) + '))')
+        return _chain('*',other,self)
     #other
     def __abs__(self):
-        return GK_Operators('abs('+str(self)+')')
+        return GK_Expression('abs',self)
     """
     object.__iadd__(self, other)
     object.__isub__(self, other)
@@ -103,6 +121,175 @@ class GK_Operators:
         return GK_Operators('(' + str(other) + '^' + str(self) + ')')
     """
 
+#text surrounding the operands of each operation in the .apm model
+_binary_format = {'<':('','<',''),
+                  '<=':('','<=',''),
+                  '>':('','>',''),
+                  '>=':('','>=',''),
+                  '=':('','=',''),
+                  '^':('(','^',')')}
+_unary_format = {'neg':('(-',')'),
+                 'dt':('$',''),
+                 'minimize':('minimize ',''),
+                 'maximize':('maximize ','')}
+
+
+class GK_Expression(GK_Operators):
+    """Node of an expression tree. Operators and model functions only link
+    their operands, so building an expression is linear in its size. The
+    string is rendered by _render when the model file is written.
+
+    Nodes only have slots (no __dict__ and no GK_Value of their own)."""
+
+    __slots__ = ('_op', '_args', '_signs', '_n')
+
+    def __init__(self, op, *args):
+        self._op = op
+        self._args = tuple(_operand(a) for a in args)
+
+    #expressions have no value of their own
+    @property
+    def VALUE(self):
+        return GK_Value(None)
+    value = VALUE
+
+    @property
+    def name(self):
+        return _render(self)
+    NAME = name
+
+    def __repr__(self):
+        return _render(self)
+    def __str__(self):
+        return _render(self)
+
+    def __reduce__(self):
+        #pickle (and copy) the rendered text instead of a deep tree
+        return (GK_Constant, (_render(self),))
+
+    def _operands(self):
+        """Operands of this node (the terms of a sum or product)"""
+        if self._op in ('sum','prod'):
+            return self._args[:self._n]
+        return self._args
+
+    def _operators(self):
+        """Signs (+,-,*,/) in front of each term of a sum or product"""
+        if self._op in ('sum','prod'):
+            return tuple(self._signs[:self._n])
+        return ()
+
+    def _tokens(self):
+        """Text and operands of this node, in writing order"""
+        a = self._args
+        if self._op == 'sum': #(a+b-c)
+            tokens = ['(', a[0]]
+            for i in range(1, self._n):
+                tokens.append(self._signs[i])
+                tokens.append(a[i])
+            tokens.append(')')
+            return tokens
+        if self._op == 'prod': #(a*b/(c+d))
+            tokens = ['(']
+            for i in range(self._n):
+                if i:
+                    tokens.append(self._signs[i])
+                tokens.extend(_wrap(a[i]))
+            tokens.append(')')
+            return tokens
+        if self._op == '^': #(a^(-2))
+            return ['('] + _wrap(a[0]) + ['^'] + _wrap(a[1]) + [')']
+        if len(a) == 2:
+            pre, mid, post = _binary_format[self._op]
+            return [pre, a[0], mid, a[1], post]
+        #functions (exp, sin, ...) use the default name(x) form
+        pre, post = _unary_format.get(self._op, (self._op+'(', ')'))
+        return [pre, a[0], post]
+
+
+def _chain(sign, left, right):
+    """Add right to the flat sum (+,-) or product (*,/) that left belongs to.
+
+    A sum or product node owns the first _n entries of its term list. The
+    list is shared with the node that extends it, so python's sum() over n
+    terms builds one flat node in O(n) instead of an n-deep nested chain.
+    """
+    op = 'sum' if sign in ('+','-') else 'prod'
+    node = GK_Expression(op)
+    if isinstance(left, GK_Expression) and left._op == op:
+        if left._n == len(left._args):
+            #nobody extended left yet, continue its lists
+            node._args = left._args
+            node._signs = left._signs
+        else:
+            node._args = left._args[:left._n]
+            node._signs = left._signs[:left._n]
+    else:
+        node._args = [_operand(left)]
+        node._signs = [None]
+    node._args.append(_operand(right))
+    node._signs.append(sign)
+    node._n = len(node._args)
+    return node
+
+
+def _operand(x):
+    """Keep GEKKO objects and numbers as references, anything else
+    (lists, arrays, strings) is converted to text right away"""
+    if isinstance(x, (GK_Operators, numbers.Number)):
+        return x
+    return str(x)
+
+
+def _wrap(x):
+    """Operand tokens of a product or power, in parentheses unless x is a
+    name, a non-negative number or a node that writes its own parentheses"""
+    if isinstance(x, GK_Expression):
+        if x._op in _binary_format and x._op != '^' or x._op in ('minimize','maximize'):
+            return ['(', x, ')']
+        return [x]
+    if isinstance(x, GK_Operators):
+        return [x]
+    if isinstance(x, numbers.Real) and not isinstance(x, bool) and x >= 0:
+        return [x]
+    return ['(', x, ')']
+
+
+def _flat(op, signs, args):
+    """New sum or product node from its signs (the first one is None) and terms"""
+    node = GK_Expression(op)
+    node._args = list(args)
+    node._signs = list(signs)
+    node._n = len(node._args)
+    return node
+
+
+def _render(node, subst=None):
+    """Write an expression tree to a string. Iterative (not recursive)
+    so long chains, such as sum() over thousands of terms, don't hit the
+    recursion limit.
+
+    subst optionally maps id(subexpression) to a name written in its place
+    """
+    out = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, GK_Expression):
+            if subst and item is not node and id(item) in subst:
+                out.append(subst[id(item)])
+            else:
+                stack.extend(reversed(item._tokens()))
+        else:
+            out.append(str(item))
+    return ''.join(out)
+
+
+class GK_Constant(GK_Operators):
+    """Named object with a value (m.Const), or model text used as it is"""
+    pass
+
+
 class GK_Intermediate(GK_Operators):
     def __init__(self, name, value=None):
         GK_Operators.__init__(self,name, value=None)
@@ -116,6 +303,8 @@ class GK_Intermediate(GK_Operators):
      
       
 class GK_Value(list):
+    __slots__ = ('value', 'change')
+
     def __init__(self,value):
         if value is not None:
             self.change = True
@@ -148,21 +337,38 @@ class GK_Value(list):
     
     def __setattr__(self, name, value):
         if name == 'value':
-            self.__dict__[name] = value
-            self.__dict__['change'] = True
+            list.__setattr__(self, 'value', value)
+            list.__setattr__(self, 'change', True)
         elif name == 'change':
-            self.__dict__['change'] = value
+            list.__setattr__(self, 'change', value)
         else:
             raise Exception('Unrecognized property')
     
     def __setitem__(self,key,value):
         self.value[key] = value
+        self._mark(key)
+
+    def set_slice(self, start, stop, values):
+        """Set elements start to stop (not included), value[start:stop] = values"""
+        self[slice(start, stop)] = values
+
+    def set_values(self, mask, values):
+        """Set the elements selected by mask (boolean array or indices) to
+        values. Only these elements are written to the next csv file."""
+        if not isinstance(self.value, np.ndarray):
+            list.__setattr__(self, 'value', np.array(self.value, dtype=float))
+        self.value[mask] = values
+        self._mark(mask)
+
+    def _mark(self, key):
+        """Register changed elements: change is False (none), True (all) or
+        a boolean mask of the changed elements, so repeated writes to the
+        same elements don't make it grow"""
+        if self.change is True:
+            return
         if self.change is False:
-            self.__dict__['change'] = [key]
-        elif isinstance(self.change,list): 
-            self.__dict__['change'].append(key)
-        else:
-            pass
+            list.__setattr__(self, 'change', np.zeros(len(self.value), dtype=bool))
+        self.change[key] = True
     
     def __array__(self):
         return np.array(self.value)
@@ -185,6 +391,9 @@ class GK_Value(list):
     def __ge__(self,other): #greater than or equal to
         return self.value >= other
     def __eq__(self,other): #equal ==
+        if isinstance(self.value, np.ndarray) and isinstance(other, (list, tuple)):
+            #results are loaded as arrays, compare to lists like a list would
+            return self.value.tolist() == list(other)
         return self.value == other
     #math operators
     def __add__(self,other): # +
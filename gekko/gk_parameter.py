@@ -29,6 +29,19 @@ class GKParameter(GK_Operators):
     """Represents a parameter in a model."""
     counter = 1
 
+    #defaults shared by all objects, only options set by the user are stored
+    #in the object
+    type = None
+    LOWER = None
+    UPPER = None
+    #register fixed values through connections to ensure consistency in the 
+    #csv file, otherwise the requested fixed value will be overridden by
+    #whatever initialization value is in the csv (list of (position, value))
+    _override_csv = ()
+    #options set after initialization, written to measurements.dbs
+    #until the next successful solve
+    _dirty = frozenset()
+
     def __init__(self, name='', value=None, lb=None, ub=None, integer=False):
         if name == '':
             name = 'p' + GKParameter.counter
@@ -41,31 +54,22 @@ class GKParameter(GK_Operators):
         # sent if changed from their defaults
         self.__dict__['_initialized'] = False
         
-        #register fixed values through connections to ensure consistency in the 
-        #csv file, otherwise the requested fixed value will be overridden by
-        #whatever initialization value is in the csv
-        #self._override_csv = []        
-        self._override_csv = []
-                
         GK_Operators.__init__(self, name, value=value)
 
         #self.VALUE = value #initialized value SET IN GK_Operators
-            
-        if not hasattr(self,'type'): #don't overwrite FV and MV
-            self.type = None 
        
         # parameters can have lower and upper bounds       
         if lb is not None:
             self.LOWER = lb
-        else:
-            self.LOWER = None
         if ub is not None:
             self.UPPER = ub
-        else:
-            self.UPPER = None
         
         # now allow options to be sent to the server
         self._initialized = True
+
+    def _clean(self):
+        """Forget the options set before the last successful solve"""
+        self.__dict__.pop('_dirty', None)
         
         
     def __repr__(self):
@@ -99,6 +103,8 @@ class GKParameter(GK_Operators):
                     self.__dict__[name].value = value
                 else:
                     self.__dict__[name] = value
+                    #options changed since the last successful solve
+                    self.__dict__.setdefault('_dirty', set()).add(name)
 
                     
             #don't allow writing to output properties by default
@@ -127,6 +133,23 @@ class GKParameter(GK_Operators):
 class GK_FV(GKParameter):
     """Fixed Variable. Inherits GKParameter."""
 
+    #option defaults shared by all FVs (options set by the user are stored in the object)
+    type = 'FV'
+    CRITICAL = None
+    DMAX = None
+    DMAXHI = None
+    DMAXLO = None
+    FSTATUS = None
+    LSTVAL = None
+    MEAS = None
+    NEWVAL = None
+    PSTATUS = None
+    STATUS = None
+    VDVL = None
+    VLACTION = None
+    VLHI = None
+    VLLO = None
+
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
 
         # prevents the __setattr__ function from sending options to the server
@@ -134,26 +157,8 @@ class GK_FV(GKParameter):
         # sent if changed from their defaults
         self.__dict__['_initialized'] = False
 
-        if not hasattr(self,'type'): #don't overwrite MV
-            self.type = 'FV'
         self.model_name = gk_model
         self.path = model_path #use the same path as the model 
-        
-        # FV options
-        self.CRITICAL = None
-        self.DMAX = None
-        self.DMAXHI = None
-        self.DMAXLO = None
-        self.FSTATUS = None
-        self.LSTVAL = None
-        self.MEAS = None
-        self.NEWVAL = None
-        self.PSTATUS = None
-        self.STATUS = None
-        self.VDVL = None
-        self.VLACTION = None
-        self.VLHI = None
-        self.VLLO = None
        
         GKParameter.__init__(self, name=name, value=value, lb=None, ub=None, integer=integer)
 
@@ -182,6 +187,18 @@ class GK_FV(GKParameter):
 class GK_MV(GK_FV):
     """ Manipulated Variable. Inherits GK_FV."""
 
+    #option defaults shared by all MVs (options set by the user are stored in the object)
+    type = 'MV'
+    AWS = None
+    COST = None
+    DCOST = None
+    DPRED = None
+    MV_STEP_HOR = None
+    NXTVAL = None
+    PRED = None
+    REQONCTRL = None
+    TIER = None
+
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
         
         # prevents the __setattr__ function from sending options to the server
@@ -189,25 +206,6 @@ class GK_MV(GK_FV):
         # sent if changed from their defaults
         self.__dict__['_initialized'] = False
 
-        # prevents the __setattr__ function from sending options to the server
-        # until the __init__ function has completed since they should only be
-        # sent if changed from their defaults
-        self.initialized = False
-
-        self.type = 'MV'
-
-        # options for manipulated variables
-        self.AWS = None
-        self.COST = None
-        self.DCOST = None
-        self.DPRED = None
-        self.MV_STEP_HOR = None
-        self.NXTVAL = None
-        self.PRED = None
-        self.REQONCTRL = None
-        self.TIER = None
-        
-        
         GK_FV.__init__(self, name=name, value=value, lb=lb, ub=ub, gk_model=gk_model, model_path=model_path, integer=integer)
 
         
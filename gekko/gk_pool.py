@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# detect IPython
+try:
+    __IPYTHON__
+except NameError:
+    ipython=False
+else:
+    ipython=True
+
+
+def local_solver():
+    """Path of the APM executable for this platform and whether it needs
+    to be started in a shell"""
+    dirname = os.path.dirname(os.path.realpath(__file__))
+    sselect = False
+    if sys.platform=='win32' or sys.platform=='win64': # Windows 32 or 64 bit
+        apm_exe = os.path.join(dirname,'bin','apm.exe')
+        if not ipython:
+            sselect = True  # set shell=False for IPython
+    elif sys.platform=='darwin': # MacOS
+        apm_exe = os.path.join(dirname,'bin','apm_mac')
+    elif sys.platform=='linux' or sys.platform=='linux2': # Linux
+        if os.uname()[4].startswith("arm"): # ARM processor (Raspberry Pi)
+            apm_exe = os.path.join(dirname,'bin','apm_arm')
+        else: # Other Linux
+            apm_exe = os.path.join(dirname,'bin','apm')
+    else:
+        raise Exception('Platform '+sys.platform+' not supported for local solve, set remote=True')
+    return apm_exe, sselect
+
+
+class SolverPool(object):
+    """Pool of local solver workers shared by models.
+
+    Solve jobs (one run of the APM executable in a model folder) are put on
+    a queue and taken by a fixed number of worker threads, so no more than
+    `workers` solvers run at the same time over all models that share the
+    pool, however many solves (solve_async, solve_batch) are started. APM
+    has no resident mode: each job starts the solver in the model folder::
+
+        pool = SolverPool(4)
+        m1 = GEKKO(remote=False, worker_pool=pool)
+        m2 = GEKKO(remote=False, worker_pool=pool)
+
+    The latency of every job is recorded in `latency` as a dictionary with
+    the model name, the time spent waiting in the queue (wait), running the
+    solver (solve) and in total (total), in seconds.
+    """
+
+    def __init__(self, workers=1):
+        #concurrent.futures is in the standard library of python 3
+        #(python 2 needs the futures backport)
+        from concurrent.futures import ThreadPoolExecutor
+        if workers < 1:
+            raise ValueError('worker_pool needs at least one worker')
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self.latency = []
+
+    def submit(self, args, path, name, shell=False, timeout=None, line_callback=None):
+        """Queue a solver run of the command args in folder path.
+
+        line_callback, if given, is called (on the worker thread) with each
+        line of solver output as it arrives.
+
+        Returns a concurrent.futures.Future with the (stdout, stderr) text
+        """
+        return self._executor.submit(self._run, args, path, name, shell, timeout, \
+                                     line_callback, time.time())
+
+    def _run(self, args, path, name, shell, timeout, line_callback, queued):
+        started = time.time()
+        app = subprocess.Popen(args, stdout=subprocess.PIPE, \
+                               stderr=subprocess.PIPE, cwd=path, bufsize=4096, \
+                               env={"PATH": path}, universal_newlines=True, shell=shell)
+        if line_callback is not None:
+            outs, errs = _stream(app, line_callback, timeout)
+        elif timeout is None or sys.version_info[0] == 2: # Python 2 doesn't have timeout
+            outs, errs = app.communicate()
+        else:
+            try:
+                outs, errs = app.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                app.kill()
+                outs, errs = app.communicate()
+                raise Exception('Time Limit Exceeded: ' + str(timeout))
+        finished = time.time()
+        with self._lock:
+            self.latency.append({'name': name, 'wait': started - queued, \
+                                 'solve': finished - started, 'total': finished - queued})
+        return outs, errs
+
+    def stats(self):
+        """Number of jobs and mean/max latency (seconds) over all jobs"""
+        with self._lock:
+            jobs = list(self.latency)
+        if not jobs:
+            return {'jobs': 0}
+        total = [j['total'] for j in jobs]
+        return {'jobs': len(jobs),
+                'mean_wait': sum(j['wait'] for j in jobs)/len(jobs),
+                'mean_solve': sum(j['solve'] for j in jobs)/len(jobs),
+                'mean_total': sum(total)/len(total),
+                'max_total': max(total)}
+
+    def shutdown(self, wait=True):
+        """Stop the workers once the queued jobs are done"""
+        self._executor.shutdown(wait=wait)
+
+
+def _stream(app, line_callback, timeout):
+    """Pass each line of output of the solver process app to line_callback
+    while it runs. The process is killed after timeout seconds"""
+    killed = []
+    timer = None
+    if timeout is not None:
+        def kill():
+            killed.append(True)
+            app.kill()
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+    lines = []
+    for line in iter(app.stdout.readline, ''):
+        lines.append(line)
+        line_callback(line.rstrip('\n'))
+    errs = app.stderr.read()
+    app.wait()
+    if timer is not None:
+        timer.cancel()
+    if killed:
+        raise Exception('Time Limit Exceeded: ' + str(timeout))
+    return ''.join(lines), errs
+
+
+#background solves (GEKKO.solve_async) of all models share one executor
+_async_executor = None
+_async_lock = threading.Lock()
+
+def async_executor():
+    """Executor running GEKKO.solve_async jobs, created on first use"""
+    global _async_executor
+    with _async_lock:
+        if _async_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            import multiprocessing
+            _async_executor = ThreadPoolExecutor(max_workers=multiprocessing.cpu_count()*5)
+        return _async_executor
@@ -3,16 +3,51 @@
 import json
 import os
 
+import numpy as np
+
+try: #faster JSON parser, if installed
+    import ujson
+except ImportError:
+    ujson = None
+
 from .properties import parameter_options, variable_options
+from .gk_operators import GK_Intermediate
+from .gk_parameter import GKParameter
+from .gk_variable import GKVariable
+from .gk_var_array import GKVarArray
 
 
 #%% Post-solve processing
 
+def _read_json(self, filename):
+    """Parse a solution file (results.json, options.json) once per solve.
+    load_results, load_JSON, verify_input_options and the GUI share the
+    parsed data until the next solve clears self._json_cache"""
+    if filename not in self._json_cache:
+        self._json_cache[filename] = _parse_json(os.path.join(self._path,filename))
+    return self._json_cache[filename]
+
+def _parse_json(path):
+    """Parse a JSON file, with ujson if it is installed"""
+    with open(path) as f:
+        text = f.read()
+    if ujson is not None:
+        try:
+            return ujson.loads(text)
+        except ValueError: #eg NaN, only accepted by the json module
+            pass
+    return json.loads(text)
+
+def _to_array(values):
+    """Results as a float64 array (left as they are if not numeric)"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return values
+
 ## options.JSON has all APM options
 def load_JSON(self):
-    f = open(os.path.join(self._path,'options.json'))
-    data = json.load(f)
-    f.close()
+    data = self._read_json('options.json')
     #global (APM) options
     for o in self.options._output_option_list+self.options._inout_option_list:
         self.options.__dict__[o] = data['APM'][o]
@@ -74,28 +109,40 @@ def load_JSON(self):
 ## results.json has variable value results
 def load_results(self):
     if (os.path.isfile(os.path.join(self._path, 'results.json'))):
-        f = open(os.path.join(self._path,'results.json'))
-        data = json.load(f)
-        f.close()
-
-        for vp in self._parameters:
-            try:
-                vp.VALUE = data[vp.name]
-                vp.value.change = False
-            except Exception:
-                print(vp.name+ " not found in results file")
-        for i in self._intermediates:
-            try:
-                i.value.value = data[i.name]
-                i.value.change = False
-            except Exception:
-                print(i.name+ " not found in results file")
-        for vp in self._variables:
-            try:
-                vp.VALUE = data[vp.name]
-                vp.value.change = False
-            except Exception:
-                print(vp.name+ " not found in results file")
+        data = self._read_json('results.json')
+
+        #map each result to the objects of that name through the name index
+        loaded = 0
+        elements = {}
+        for name in data:
+            matches = self._name_index.get(name)
+            if matches is None:
+                if name.endswith(']') and '[' in name:
+                    #element x[i] of a variable array
+                    base, number = name[:-1].split('[', 1)
+                    if number.isdigit() and any(isinstance(x, GKVarArray) \
+                                                for x in self._name_index.get(base, [])):
+                        elements.setdefault(base, {})[int(number)] = data[name]
+                continue
+            for x in matches:
+                if isinstance(x, GK_Intermediate):
+                    x.value.value = _to_array(data[name])
+                elif isinstance(x, (GKParameter, GKVariable)):
+                    x.VALUE = _to_array(data[name])
+                else: #constants, ...
+                    continue
+                x.value.change = False
+                loaded += 1
+        for array in self._arrays:
+            if array.name in elements:
+                array._load(elements[array.name])
+            else:
+                print(array.name+ " not found in results file")
+
+        if loaded < len(self._parameters)+len(self._intermediates)+len(self._variables):
+            for x in self._parameters+self._intermediates+self._variables:
+                if x.name not in data:
+                    print(x.name+ " not found in results file")
 
         return data
 
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the APM web server.
+
+Implements the requests of the remote solve path (apm.cmd, apm.get_ip and
+apm.get_file) on top of the local apm executable, so remote mode can be
+run and benchmarked offline or self-hosted::
+
+    from gekko.gk_server import start
+    server = start()                      # background thread, free port
+    m = GEKKO(remote=True, server=server.url)
+    ...
+    server.shutdown()
+
+or from the command line: python -m gekko.gk_server --port 8000
+
+Endpoints:
+    POST /online/apm_line.php   p=application, a=command
+    GET  /ip.php                IP address of the client
+    GET  /online/<ip>_<app>/<file>  file of the application folder
+
+Each client IP and application has its own folder. Requests are handled
+concurrently, commands to the same application one at a time.
+"""
+
+import gzip
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import zlib
+
+try: # Python 3+
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs
+except ImportError: # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs
+
+from .gk_pool import local_solver
+
+#application and file names (no paths)
+_valid_name = re.compile(r'^[\w.\-]+$')
+
+
+class APMHandler(BaseHTTPRequestHandler):
+    """Requests of one connection (kept alive between requests)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    #%% Responses
+    def _send(self, body, status=200, content_type='text/plain'):
+        if not isinstance(body, bytes):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        #request bodies may be gzip compressed (RFC 7694)
+        self.send_header('Accept-Encoding', 'gzip')
+        if len(body) >= self.server.min_compress \
+                and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+                f.write(body)
+            body = buf.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, lines):
+        """Send lines as they are produced (chunked transfer encoding)"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for line in lines:
+            if not isinstance(line, bytes):
+                line = line.encode()
+            if line:
+                self.wfile.write(('%x\r\n' % len(line)).encode() + line + b'\r\n')
+                self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+    #%% Requests
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/ip.php':
+            self._send(self.client_address[0])
+            return
+        parts = path.split('/')
+        if len(parts) == 4 and parts[1] == 'online' \
+                and _valid_name.match(parts[2]) and _valid_name.match(parts[3]):
+            filename = os.path.join(self.server.root, parts[2], parts[3])
+            if os.path.isfile(filename):
+                with open(filename, 'rb') as f:
+                    self._send(f.read())
+                return
+        self._send('Not found', 404)
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/online/apm_line.php':
+            self._send('Not found', 404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        encoding = self.headers.get('Content-Encoding', '').lower()
+        if encoding in ('gzip', 'x-gzip'):
+            body = zlib.decompress(body, 16+zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        elif encoding:
+            self._send('Unsupported content encoding', 415)
+            return
+        params = parse_qs(body.decode(), keep_blank_values=True)
+        app = params.get('p', [''])[0].lower().replace(' ', '')
+        aline = params.get('a', [''])[0]
+        if not _valid_name.match(app):
+            self._send('@error: invalid application name', 400)
+            return
+        folder = os.path.join(self.server.root, self.client_address[0] + '_' + app)
+        with self.server.app_lock(folder):
+            if aline == 'solve':
+                self._stream(self.server.solve(folder, app))
+            else:
+                self._send(self.server.command(folder, app, aline))
+
+
+class APMServer(ThreadingMixIn, HTTPServer):
+    """APM web server stand-in solving with the local apm executable.
+
+    address: (host, port), port 0 picks a free port
+    root: folder for the application folders (default: new temporary folder)
+    apm_exe: solver executable (default: apm of this platform)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), root=None, apm_exe=None, verbose=False):
+        HTTPServer.__init__(self, address, APMHandler)
+        self.root = root or tempfile.mkdtemp(suffix='apm_server')
+        if apm_exe is None:
+            apm_exe, self._shell = local_solver()
+        else:
+            self._shell = False
+        self.apm_exe = apm_exe
+        self.verbose = verbose
+        self.min_compress = 1024
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def url(self):
+        """Address to use as GEKKO(server=...)"""
+        return 'http://%s:%d' % self.server_address[:2]
+
+    def app_lock(self, folder):
+        with self._locks_lock:
+            if folder not in self._locks:
+                self._locks[folder] = threading.Lock()
+            return self._locks[folder]
+
+    def command(self, folder, app, aline):
+        """Run a command of apm.cmd (other than solve) and return the reply"""
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        def path(extension):
+            return os.path.join(folder, app + '.' + extension)
+        def remove(filename):
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+        if aline.startswith(' '): #model text (and File sections) appended to the model
+            with open(path('apm'), 'a') as f:
+                f.write(aline[1:])
+        elif aline.startswith('csv '):
+            with open(path('csv'), 'a') as f:
+                f.write(aline[4:])
+        elif aline.startswith('info '):
+            with open(path('info'), 'a') as f:
+                f.write(aline[5:])
+        elif aline.startswith('option '):
+            #options since the last solve, the rest is in the application database
+            with open(os.path.join(folder, 'measurements.dbs'), 'w') as f:
+                f.write(aline[7:])
+        elif aline == 'clear all':
+            shutil.rmtree(folder, ignore_errors=True)
+            os.makedirs(folder)
+        elif aline == 'clear apm':
+            remove(path('apm'))
+        elif aline == 'clear csv':
+            remove(path('csv'))
+        else:
+            return '@error: unknown command ' + aline.split('\n')[0][:40]
+        return ''
+
+    def solve(self, folder, app):
+        """Run apm in the application folder, yielding its output lines"""
+        if not os.path.isfile(os.path.join(folder, app + '.apm')):
+            yield '@error: no model for application ' + app + '\n'
+            return
+        try:
+            process = subprocess.Popen([self.apm_exe, app], stdout=subprocess.PIPE, \
+                                       stderr=subprocess.STDOUT, cwd=folder, \
+                                       env={"PATH": folder}, universal_newlines=True, \
+                                       shell=self._shell)
+        except OSError as e:
+            yield '@error: solver not started: ' + str(e) + '\n'
+            return
+        for line in iter(process.stdout.readline, ''):
+            yield line
+        process.stdout.close()
+        process.wait()
+
+
+def start(host='127.0.0.1', port=0, root=None, apm_exe=None):
+    """Start a server in a background thread and return it (server.url,
+    server.shutdown())"""
+    server = APMServer((host, port), root, apm_exe)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Local APM web server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--root', default=None, help='folder for the applications')
+    parser.add_argument('--apm', default=None, help='apm executable')
+    args = parser.parse_args()
+    server = APMServer((args.host, args.port), args.root, args.apm, verbose=True)
+    print('Serving APM on ' + server.url + ' (applications in ' + server.root + ')')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
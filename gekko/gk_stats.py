@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import os
+import time
+
+
+#%% Solve statistics
+
+class SolveStats(object):
+    """Wall time, bytes written and read and object counts of every phase of
+    the solves of a model (m.stats).
+
+    Phases are: build model, build csv, build dbs, build solver options,
+    write info, solve, load results, load JSON and debug. Totals are kept over
+    all solves and the phases of the last `history` solves are kept one by
+    one::
+
+        m.solve(profile=True)  # also prints the phases of this solve
+        m.stats.to_dict()      # totals per phase
+        m.stats.to_csv('stats.csv')  # one row per phase of each solve
+    """
+
+    columns = ('solve', 'phase', 'time', 'bytes_written', 'bytes_read')
+
+    def __init__(self, history=1000):
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded solves"""
+        self.solves = 0
+        self.objects = {}
+        self.totals = collections.OrderedDict()
+        self.records = collections.deque(maxlen=self.history)
+
+    def start(self, objects):
+        """Start recording a solve. objects are the object counts of the model"""
+        self.solves += 1
+        self.objects = objects
+        record = SolveRecord(self.solves, objects, self)
+        self.records.append(record)
+        return record
+
+    def _add(self, phase):
+        total = self.totals.get(phase.name)
+        if total is None:
+            total = self.totals[phase.name] = {'calls': 0, 'time': 0.0, 'max_time': 0.0, \
+                                               'bytes_written': 0, 'bytes_read': 0}
+        total['calls'] += 1
+        total['time'] += phase.time
+        total['max_time'] = max(total['max_time'], phase.time)
+        total['bytes_written'] += phase.bytes_written
+        total['bytes_read'] += phase.bytes_read
+
+    def to_dict(self):
+        """Number of solves, object counts of the last solve and totals
+        (calls, time, mean_time, max_time, bytes_written, bytes_read) per phase"""
+        phases = collections.OrderedDict()
+        for name, total in self.totals.items():
+            phases[name] = dict(total, mean_time=total['time']/total['calls'])
+        return {'solves': self.solves, 'objects': dict(self.objects), 'phases': phases}
+
+    def rows(self):
+        """One dictionary (columns) per phase of the recorded solves"""
+        rows = []
+        for record in self.records:
+            for phase in record.phases:
+                rows.append({'solve': record.solve, 'phase': phase.name, 'time': phase.time, \
+                             'bytes_written': phase.bytes_written, 'bytes_read': phase.bytes_read})
+        return rows
+
+    def to_csv(self, filename):
+        """Write one row per phase of the recorded solves to a csv file"""
+        with open(filename, 'w') as f:
+            f.write(','.join(self.columns) + '\n')
+            for row in self.rows():
+                f.write(','.join(str(row[c]) for c in self.columns) + '\n')
+
+    def __repr__(self):
+        if not self.records:
+            return 'No solves recorded'
+        return self.records[-1].report()
+
+
+class SolveRecord(object):
+    """Phases of one solve"""
+
+    def __init__(self, solve, objects, stats):
+        self.solve = solve
+        self.objects = objects
+        self.phases = []
+        self._stats = stats
+
+    def phase(self, name):
+        """Start timing a phase of the solve, finished by Phase.done()"""
+        return Phase(name, self)
+
+    def report(self):
+        """Table of the phases of this solve"""
+        lines = ['Solve ' + str(self.solve) + ': ' + \
+                 ', '.join(k + ' ' + str(v) for k, v in sorted(self.objects.items())),
+                 '%-22s %10s %14s %14s' % ('phase', 'time (s)', 'bytes written', 'bytes read')]
+        for p in self.phases:
+            lines.append('%-22s %10.4f %14d %14d' % (p.name, p.time, p.bytes_written, p.bytes_read))
+        lines.append('%-22s %10.4f' % ('total', sum(p.time for p in self.phases)))
+        return '\n'.join(lines)
+
+
+class Phase(object):
+    """Wall time and bytes written and read of one phase"""
+
+    def __init__(self, name, record):
+        self.name = name
+        self.time = 0.0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self._record = record
+        self._start = time.time()
+
+    def wrote(self, path):
+        """Count the size of a file written in this phase"""
+        if os.path.isfile(path):
+            self.bytes_written += os.path.getsize(path)
+
+    def read(self, path):
+        """Count the size of a file read in this phase"""
+        if os.path.isfile(path):
+            self.bytes_read += os.path.getsize(path)
+
+    def done(self):
+        """End of the phase"""
+        self.time = time.time() - self._start
+        self._record.phases.append(self)
+        self._record._stats._add(self)
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+import operator
+
+import numpy as np
+
+from .gk_operators import GK_Operators, GK_Expression, _flat
+
+
+#comparisons of object arrays give bools in numpy, but comparing GEKKO
+#objects gives equations
+_compare = dict((name, np.frompyfunc(f, 2, 1)) for name, f in [
+    ('lt', operator.lt), ('le', operator.le), ('gt', operator.gt),
+    ('ge', operator.ge), ('eq', operator.eq)])
+
+
+class GK_ElementArray(np.ndarray):
+    """numpy object array of GEKKO elements or expressions. Arithmetic is
+    element-wise as for any object array and comparisons give arrays of
+    equations (m.Equation accepts them)"""
+
+    def _compare(self, op, other):
+        return np.asarray(_compare[op](self, other), dtype=object).view(GK_ElementArray)
+
+    def __lt__(self, other):
+        return self._compare('lt', other)
+    def __le__(self, other):
+        return self._compare('le', other)
+    def __gt__(self, other):
+        return self._compare('gt', other)
+    def __ge__(self, other):
+        return self._compare('ge', other)
+    def __eq__(self, other):
+        return self._compare('eq', other)
+    __hash__ = None
+
+
+class GKVarArray(object):
+    """Array of variables written to the model as name[1:n].
+
+    Values and bounds are kept in numpy arrays (nan where not given) instead
+    of one GKVariable per element, so large arrays are cheap to create and
+    to write. Elements are numbered in C order from 1 in the model file.
+
+    x[i] (or x[i,j]) is the element used in equations, x[a:b] an object
+    array of elements, and operators between arrays (or an array and a
+    number, list or numpy array) give object arrays of expressions that
+    m.Equation accepts:
+
+        x = m.VarArray(100, lb=0, ub=10)
+        m.Equation(x[1:] - x[:-1] >= 0.5)
+        m.Obj(x.sum())
+
+    Only the options of a plain Var are supported: an initial value (the
+    same at all time points) and bounds. Use m.Array(m.MV, ...) and the
+    other special variable types for FV/MV/CV/SV options and
+    time-varying values.
+    """
+
+    #let numpy call the reverse operators (ndarray + x)
+    __array_ufunc__ = None
+
+    def __init__(self, name, shape, value=None, lb=None, ub=None):
+        self.__dict__['name'] = name
+        self.__dict__['shape'] = tuple(np.atleast_1d(shape).astype(int))
+        self.__dict__['size'] = int(np.prod(self.shape))
+        if self.size < 1 or min(self.shape) < 1:
+            raise ValueError('A variable array needs at least one element, not shape ' \
+                             + str(self.shape))
+        self.__dict__['VALUE'] = self._full(value)
+        self.__dict__['LOWER'] = self._full(lb)
+        self.__dict__['UPPER'] = self._full(ub)
+        #solution loaded by the last solve
+        self.__dict__['_results'] = None
+
+    def _full(self, values):
+        """values (None, a number or an array of this shape) as a float array"""
+        a = np.empty(self.shape)
+        try:
+            a[...] = np.nan if values is None else values
+        except ValueError:
+            raise ValueError('Values of a variable array are a number or an array of its shape ' \
+                             + str(self.shape) + ' (no time-varying values)')
+        return a
+
+    #make attributes case in-sensitive
+    def __getattr__(self, name):
+        if name.upper() in self.__dict__:
+            return self.__dict__[name.upper()]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        name = name.upper()
+        if name not in ('VALUE', 'LOWER', 'UPPER'):
+            raise AttributeError(name + ' is not an option of a variable array ' \
+                                 '(only value, lower and upper are)')
+        self.__dict__[name] = self._full(value)
+        if name == 'VALUE':
+            self.__dict__['_results'] = None
+
+    @property
+    def value(self):
+        """Solution of the last solve (one row per element, over time in
+        dynamic problems) or the initial values"""
+        if self._results is not None:
+            return self._results
+        return self.VALUE
+
+    def __repr__(self):
+        return str(self.value)
+
+    def __len__(self):
+        return self.shape[0]
+
+    #%% Elements
+    def _element_names(self):
+        return np.arange(1, self.size+1).reshape(self.shape)
+
+    def __getitem__(self, key):
+        number = self._element_names()[key]
+        if np.ndim(number) == 0:
+            return GK_ArrayElement(self, int(number))
+        elements = np.empty(np.shape(number), dtype=object).view(GK_ElementArray)
+        for i, n in np.ndenumerate(number):
+            elements[i] = GK_ArrayElement(self, int(n))
+        return elements
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def elements(self):
+        """Object array of all elements"""
+        return self[...]
+
+    def sum(self):
+        """Sum of all elements (one flat sum expression)"""
+        elements = list(self.elements().flat)
+        return _flat('sum', [None]+['+']*(len(elements)-1), elements)
+
+    #%% Element-wise operators (on the array of all elements)
+    def _other(self, other):
+        if isinstance(other, GKVarArray):
+            return other.elements()
+        return other
+
+    def __add__(self, other):
+        return self.elements() + self._other(other)
+    def __sub__(self, other):
+        return self.elements() - self._other(other)
+    def __mul__(self, other):
+        return self.elements() * self._other(other)
+    def __truediv__(self, other):
+        return self.elements() / self._other(other)
+    __div__ = __truediv__
+    def __pow__(self, other):
+        return self.elements() ** self._other(other)
+    def __radd__(self, other):
+        return other + self.elements()
+    def __rsub__(self, other):
+        return other - self.elements()
+    def __rmul__(self, other):
+        return other * self.elements()
+    def __rtruediv__(self, other):
+        return other / self.elements()
+    __rdiv__ = __rtruediv__
+    def __rpow__(self, other):
+        return other ** self.elements()
+    def __neg__(self):
+        return -self.elements()
+    def __lt__(self, other):
+        return self.elements() < self._other(other)
+    def __le__(self, other):
+        return self.elements() <= self._other(other)
+    def __gt__(self, other):
+        return self.elements() > self._other(other)
+    def __ge__(self, other):
+        return self.elements() >= self._other(other)
+    def __eq__(self, other):
+        return self.elements() == self._other(other)
+    def __hash__(self):
+        return id(self)
+
+    #%% Model file and results
+    def _declarations(self):
+        """Declaration lines: name[i:j] = value, <= ub, >= lb for each run of
+        elements with the same value and bounds (one line if all are equal)"""
+        columns = [a.ravel() for a in (self.VALUE, self.UPPER, self.LOWER)]
+        #element k starts a new run if anything differs from element k-1
+        start = np.zeros(self.size, dtype=bool)
+        start[0] = True
+        for a in columns:
+            same = (a[1:] == a[:-1]) | (np.isnan(a[1:]) & np.isnan(a[:-1]))
+            start[1:] |= ~same
+        starts = np.flatnonzero(start)
+        ends = np.append(starts[1:], self.size)
+        lines = []
+        for i, j in zip(starts, ends):
+            parts = []
+            for text, a in zip(('= %s', '<= %s', '>= %s'), columns):
+                if not np.isnan(a[i]):
+                    parts.append(text % a[i])
+            head = '\t%s[%d:%d]' % (self.name, i+1, j)
+            if parts:
+                lines.append('%s %s\n' % (head, ', '.join(parts)))
+            else:
+                lines.append(head + '\n')
+        return lines
+
+    def _fingerprint(self):
+        return (self.name, self.shape, self.VALUE.tobytes(), \
+                self.LOWER.tobytes(), self.UPPER.tobytes())
+
+    def _load(self, results):
+        """Set the solution from {element number: values} of results.json"""
+        rows = [np.atleast_1d(results.get(n, np.nan)) for n in range(1, self.size+1)]
+        length = max(len(r) for r in rows)
+        values = np.full((self.size, length), np.nan)
+        for k, r in enumerate(rows):
+            values[k, :len(r)] = r
+        if length == 1:
+            values = values.reshape(self.shape)
+        else:
+            values = values.reshape(self.shape + (length,))
+        self.__dict__['_results'] = values
+
+
+class GK_ArrayElement(GK_Operators):
+    """Element name[n] of a GKVarArray, used in expressions"""
+
+    __slots__ = ('_array', '_number')
+
+    def __init__(self, array, number):
+        self._array = array
+        self._number = number
+
+    @property
+    def name(self):
+        return '%s[%d]' % (self._array.name, self._number)
+    NAME = name
+
+    def dt(self):
+        return GK_Expression('dt',self)
+
+    @property
+    def value(self):
+        values = self._array.value
+        return values.reshape((self._array.size,) + values.shape[len(self._array.shape):])[self._number-1]
@@ -1,5 +1,5 @@
 import os
-from .gk_operators import GK_Operators
+from .gk_operators import GK_Operators, GK_Expression
 
 
 """
@@ -29,6 +29,19 @@ from .properties import variable_options as options
 class GKVariable(GK_Operators):
     """Represents a parameter in a model"""
     counter = 0
+
+    #defaults shared by all objects, only options set by the user are stored
+    #in the object
+    type = None
+    LOWER = None
+    UPPER = None
+    #register fixed values through connections to ensure consistency in the 
+    #csv file, otherwise the requested fixed value will be overridden by
+    #whatever initialization value is in the csv (list of (position, value))
+    _override_csv = ()
+    #options set after initialization, written to measurements.dbs
+    #until the next successful solve
+    _dirty = frozenset()
     
     def __init__(self, name='', value=None, lb=None, ub=None, integer=False):
         if name == '':
@@ -46,30 +59,22 @@ class GKVariable(GK_Operators):
         GK_Operators.__init__(self, name, value=value)
 
         #self.VALUE = value #initialized value is done in GK_Operators
-        if not hasattr(self,'type'): #don't overwrite SV and CV
-            self.type = None 
-            
         if lb is not None:
             self.LOWER = lb
-        else:
-            self.LOWER = None
         if ub is not None:
             self.UPPER = ub
-        else:
-            self.UPPER = None
-        
-        #register fixed values through connections to ensure consistency in the 
-        #csv file, otherwise the requested fixed value will be overridden by
-        #whatever initialization value is in the csv
-        self._override_csv = []
         
         #register values that are changed by the user 
         #self._changed = True
         # now allow options to be sent to the server
         self._initialized = True
 
+    def _clean(self):
+        """Forget the options set before the last successful solve"""
+        self.__dict__.pop('_dirty', None)
+
     def dt(self):
-        return GK_Operators('$' + self.name)
+        return GK_Expression('dt',self)
 
     def __repr__(self):
         return str(self.value)
@@ -103,6 +108,8 @@ class GKVariable(GK_Operators):
                     self.__dict__[name].value = value
                 else:
                     self.__dict__[name] = value
+                    #options changed since the last successful solve
+                    self.__dict__.setdefault('_dirty', set()).add(name)
                     
                         
             #don't allow writing to output properties by default
@@ -132,6 +139,15 @@ class GKVariable(GK_Operators):
 class GK_SV(GKVariable):
     """State Variable. Inherits GKVariable."""
 
+    #option defaults shared by all SVs (options set by the user are stored in the object)
+    type = 'SV'
+    FSTATUS = None
+    LOWER = None
+    MEAS = None
+    MODEL = None
+    PRED = None
+    UPPER = None
+
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
 
         # prevents the __setattr__ function from sending options to the server
@@ -139,25 +155,42 @@ class GK_SV(GKVariable):
         # sent if changed from their defaults
         self.__dict__['_initialized'] = False
         
-        if not hasattr(self,'type'): #don't overwrite CV
-            self.type = 'SV'
         self.model_name = gk_model 
         self.path = model_path #use the same path as the model 
         
-        # SV specific options
-        self.FSTATUS = None
-        self.LOWER = None
-        self.MEAS = None
-        self.MODEL = None
-        self.PRED = None
-        self.UPPER = None
-        
         GKVariable.__init__(self, name, value, lb, ub, integer)
 
         
 
 class GK_CV(GK_SV):
     """Controlled Variable. Inherits variable """
+
+    #option defaults shared by all CVs (options set by the user are stored in the object)
+    type = 'CV'
+    BIAS = None
+    COST = None
+    CRITICAL = None
+    FDELAY = 0
+    LSTVAL = None
+    MEAS_GAP = None
+    PSTATUS = None
+    SP = None
+    SPHI = None
+    SPLO = None
+    STATUS = None
+    TAU = None
+    TIER = None
+    TR_INIT = 0
+    TR_OPEN = None
+    VDVL = None
+    VLACTION = None
+    VLHI = None
+    VLLO = None
+    WMEAS = None
+    WMODEL = None
+    WSP = None
+    WSPHI = None
+    WSPLO = None
     
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
 
@@ -165,35 +198,6 @@ class GK_CV(GK_SV):
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
         self.__dict__['_initialized'] = False
-        
-        
-        self.type = 'CV'
-        
-        # CV specific options
-        self.BIAS = None
-        self.COST = None
-        self.CRITICAL = None
-        self.FDELAY = 0
-        self.LSTVAL = None
-        self.MEAS_GAP = None
-        self.PSTATUS = None
-        self.SP = None
-        self.SPHI = None
-        self.SPLO = None
-        self.STATUS = None
-        self.TAU = None
-        self.TIER = None
-        self.TR_INIT = 0
-        self.TR_OPEN = None
-        self.VDVL = None
-        self.VLACTION = None
-        self.VLHI = None
-        self.VLLO = None
-        self.WMEAS = None
-        self.WMODEL = None
-        self.WSP = None
-        self.WSPHI = None
-        self.WSPLO = None
 
         GK_SV.__init__(self, name=name, value=value, lb=lb, ub=ub, gk_model=gk_model, model_path=model_path, integer=integer)
 
@@ -1,126 +1,119 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import math
+import numbers
 import numpy as np
 import os
+import re
+try:
+    from math import gcd
+except ImportError: # Python 2
+    from fractions import gcd
 
 from .properties import global_options, parameter_options, variable_options
-from .gk_operators import GK_Operators
+from .gk_operators import GK_Operators, GK_Expression, _render, _flat
 
 #%% Write files
 
 def _build_model(self):
     ''' Write model to apm file.
 
+    Each section is written line by line to the file, so memory use doesn't
+    grow with the size of the model text.
+
     Also does some minimal model validation
 
     Returns:
         Does not return
     '''
-    model = ''
+    # Create .apm file
+    if(self._model_name == None):
+        self._model_name = "default_model_name"
+    filename = self._model_name + '.apm'
+
+    # Create file in writable format always overrite previous model file
+    f = open(os.path.join(self._path,filename), 'w')
+    write = f.write
+    def line(text):
+        write(_normalize(text))
+
+    write('Model\n')
 
     if self._constants:
-        model += 'Constants\n'
+        write('Constants\n')
         for const in self._constants:
-            model += '\t%s = %s\n' % (const, const.value)
-        model += 'End Constants\n'
+            line('\t%s = %s\n' % (const, const.value))
+        write('End Constants\n')
 
     if self._parameters:
-        model += 'Parameters\n'
-        for parameter in self._parameters:
-            i = 0
-            model += '\t%s' % parameter
-            if not isinstance(parameter.VALUE.value, (list,np.ndarray)):
-                if not (parameter.VALUE==None):
-                    i = 1
-                    model += ' = %s' % parameter.VALUE
-            if parameter.UPPER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '<= %s' % parameter.UPPER
-            if parameter.LOWER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '>= %s' % parameter.LOWER
-            model += '\n'
-        model += 'End Parameters\n'
-
-    if self._variables:
-        model += 'Variables\n'
-        for variable in self._variables:
-            i = 0
-            model += '\t%s' % variable
-            if not isinstance(variable.VALUE.value, (list,np.ndarray)):
-                if not (variable.VALUE==None):
-                    i = 1
-                    model += ' = %s' % variable.VALUE
-            if variable.UPPER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '<= %s' % variable.UPPER
-            if variable.LOWER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '>= %s' % variable.LOWER
-            model += '\n'
-        model += 'End Variables\n'
-
-    if self._intermediates:
-        model += 'Intermediates\n'
-        for i in range(len(self._inter_equations)):
-            model += '\t%s=%s\n' % (str(self._intermediates[i]), str(self._inter_equations[i]))
-        model += 'End Intermediates\n'
+        write('Parameters\n')
+        for text in _declarations(self._parameters):
+            line(text)
+        write('End Parameters\n')
+
+    if self._variables or self._arrays:
+        write('Variables\n')
+        for text in _declarations(self._variables):
+            line(text)
+        for array in self._arrays:
+            for text in array._declarations():
+                line(text)
+        write('End Variables\n')
+
+    #equation roots in the order they are written
+    roots = list(self._inter_equations) \
+            + [eq.value for eq in self._equations] \
+            + list(self._objectives)
+    roots = _simplify(roots)
+    if self.cse:
+        subst, defs = _cse(self, roots)
+    else:
+        subst, defs = None, [[] for r in roots]
+    n_inter = len(self._intermediates)
+
+    if self._intermediates or any(defs):
+        write('Intermediates\n')
+        for i in range(len(roots)):
+            #generated intermediates go right before their first use
+            for name, node in defs[i]:
+                line('\t%s=%s\n' % (name, _render(node, subst)))
+            if i < n_inter:
+                line('\t%s=%s\n' % (str(self._intermediates[i]), _text(roots[i], subst)))
+        write('End Intermediates\n')
 
     if self._equations or self._objectives:
-        model += 'Equations\n'
-        if self._equations:
-            for equation in self._equations:
-                model += '\t%s\n' % equation
-        if self._objectives:
-            for o in self._objectives:
-                model += '\t%s\n' % o
-        model += 'End Equations\n'
+        write('Equations\n')
+        n_eq = n_inter + len(self._equations)
+        for text in _indexed(_text(r, subst) for r in roots[n_inter:n_eq]):
+            line('\t%s\n' % text)
+        for r in roots[n_eq:]:
+            line('\t%s\n' % _text(r, subst))
+        write('End Equations\n')
 
     if self._connections:
-        model += 'Connections\n'
+        write('Connections\n')
         for connection in self._connections:
-            model += '\t%s\n' % connection
-        model += 'End Connections\n'
+            line('\t%s\n' % connection)
+        write('End Connections\n')
 
     if self._objects:
-        model += 'Objects\n'
+        write('Objects\n')
         for obj_str in self._objects:
-            model += '\t%s\n' % obj_str
-        model += 'End Objects\n'
+            line('\t%s\n' % obj_str)
+        write('End Objects\n')
 
     if self._compounds:
-        model += 'Compounds\n'
+        write('Compounds\n')
         for compound in self._compounds:
-            model += '  %s\n' % (compound,)
-        model += 'End Compounds\n'
-
-    #print(model) #for debugging
-
-    #replace multiple operators resulting from signs
-    model = model.replace('++','+').replace('--','+').replace('+-','-').replace('-+','-')
-
-    # Create .apm file
-    if(self._model_name == None):
-        self._model_name = "default_model_name"
-    filename = self._model_name + '.apm'
+            line('  %s\n' % (compound,))
+        write('End Compounds\n')
 
-    # Create file in writable format always overrite previous model file
-    f = open(os.path.join(self._path,filename), 'w')
-    f.write('Model\n')
-    f.write(model)
-    f.write('\nEnd Model')
+    write('\nEnd Model')
     if self._raw:
-        f.write('\n')
+        write('\n')
         for r in self._raw:
-            f.write('%s\n'%r)
+            write('%s\n'%r)
     f.close()
 
     self._model = 'auto-generated' #what does this do?
@@ -128,6 +121,431 @@ def _build_model(self):
     self._model_initialized = True
 
 
+def _fingerprint(self):
+    """Structure of the model as written in the .apm file: declarations
+    of constants, parameters and variables plus the identity of each
+    intermediate, equation and objective and the text of connections,
+    objects and raw blocks. Expression trees never change after they are
+    created, so their identity is enough to tell whether the model text
+    would change.
+
+    Values of parameters and variables are left out (only names and
+    bounds): changed values are sent in the csv file and loading results
+    turns scalar values into arrays without changing the model. The
+    exception are changed scalar values that the csv file leaves to the
+    model file (IMODE 2).
+    """
+    if self.options.IMODE == 2:
+        values = tuple('%s = %s' % (vp, vp.VALUE) for vp in self._parameters+self._variables \
+                       if vp.VALUE.change is True \
+                       and not isinstance(vp.VALUE.value, (list,np.ndarray)))
+    else:
+        values = ()
+    return (self._model_name, self.cse,
+            tuple('%s = %s' % (c, c.value) for c in self._constants),
+            tuple(_declaration(p, False) for p in self._parameters),
+            tuple(_declaration(v, False) for v in self._variables),
+            values,
+            tuple(a._fingerprint() for a in self._arrays),
+            tuple(str(i) for i in self._intermediates),
+            tuple(id(e) for e in self._inter_equations),
+            tuple(id(e.value) for e in self._equations),
+            tuple(id(o) for o in self._objectives),
+            tuple(str(c) for c in self._connections),
+            tuple(str(o) for o in self._objects),
+            tuple(str(c) for c in self._compounds),
+            tuple(str(r) for r in self._raw))
+
+
+def _extra_file_digests(self):
+    """(name, content hash) of each extra file (eg cspline data). Files
+    are identified by their content, so the model (with all extra files)
+    is only sent to the server again when the data changed. Hashes are kept until a file is rewritten (new
+    modification time or size), so unchanged files are only read once.
+    """
+    digests = []
+    for f_name in self._extra_files:
+        path = os.path.join(self._path,f_name)
+        st = os.stat(path)
+        key = (st.st_mtime, st.st_size)
+        cached = self._file_digests.get(path)
+        if cached is None or cached[0] != key:
+            with open(path,'rb') as f:
+                cached = (key, hashlib.sha1(f.read()).hexdigest())
+            self._file_digests[path] = cached
+        digests.append((os.path.basename(f_name), cached[1]))
+    return digests
+
+
+def _declaration(var, value=True):
+    """Declaration line of a parameter or variable: name = value, <= ub, >= lb
+    (without the value if value is False)"""
+    parts = []
+    if value and not isinstance(var.VALUE.value, (list,np.ndarray)):
+        if not (var.VALUE==None):
+            parts.append('= %s' % var.VALUE)
+    if var.UPPER is not None:
+        parts.append('<= %s' % var.UPPER)
+    if var.LOWER is not None:
+        parts.append('>= %s' % var.LOWER)
+    if parts:
+        return '\t%s %s\n' % (var, ', '.join(parts))
+    return '\t%s\n' % var
+
+
+#element name[k] of an array (m.Array(..., indexed=True) of Vars or Params,
+#VarArray)
+_element = re.compile(r'([A-Za-z_]\w*)\[(\d+)\]')
+
+
+def _declarations(objects):
+    """Declaration lines of parameters or variables. Consecutive elements
+    name[k], name[k+1], ... of an array with the same value and bounds are
+    declared together as name[k:j]"""
+    run = None #[name, first, last, value and bounds]
+    for x in objects:
+        text = _declaration(x)
+        match = _element.match(x.name)
+        if match and match.end() == len(x.name):
+            name, k, rest = match.group(1), int(match.group(2)), text[len(x.name)+1:]
+            if run and run[0] == name and run[2]+1 == k and run[3] == rest:
+                run[2] = k
+                continue
+        if run:
+            yield _declaration_run(run)
+            run = None
+        if match and match.end() == len(x.name):
+            run = [name, k, k, rest]
+        else:
+            yield text
+    if run:
+        yield _declaration_run(run)
+
+
+def _declaration_run(run):
+    name, first, last, rest = run
+    if first == last:
+        return '\t%s[%d]%s' % (name, first, rest)
+    return '\t%s[%d:%d]%s' % (name, first, last, rest)
+
+
+def _indexed(lines):
+    """Merge runs of equations that only differ in their array indices, each
+    one higher than in the equation before, into one indexed equation:
+    x[2]-x[1]>=0, x[3]-x[2]>=0, x[4]-x[3]>=0 -> x[2:4]-x[1:3]>=0
+
+    The model file (and parsing it) then grows with the number of different
+    equations instead of the number of elements."""
+    run = None #[template, first indices, number of equations, text]
+    for text in lines:
+        parts = _element.split(text) #text, name, index, text, name, index, ..., text
+        indices = [int(i) for i in parts[2::3]]
+        template = (tuple(parts[0::3]), tuple(parts[1::3]))
+        if indices and run and run[0] == template \
+                and all(i == f+run[2] for i, f in zip(indices, run[1])):
+            run[2] += 1
+            continue
+        if run:
+            yield _indexed_run(run)
+            run = None
+        if indices:
+            run = [template, indices, 1, text]
+        else:
+            yield text
+    if run:
+        yield _indexed_run(run)
+
+
+def _indexed_run(run):
+    (texts, names), first, n, text = run
+    if n == 1:
+        return text
+    out = [texts[0]]
+    for name, f, t in zip(names, first, texts[1:]):
+        out.append('%s[%d:%d]%s' % (name, f, f+n-1, t))
+    return ''.join(out)
+
+
+def _normalize(text):
+    """Replace multiple operators resulting from signs"""
+    return text.replace('++','+').replace('--','+').replace('+-','-').replace('-+','-')
+
+
+def _text(x, subst=None):
+    """Model text of an expression tree or any other model entry"""
+    if isinstance(x, GK_Expression):
+        return _render(x, subst)
+    return str(x)
+
+
+#%% Model transformations
+
+def _simplify(roots):
+    """Constant folding and algebraic simplification.
+
+    Numbers in sums, products and powers are folded into one constant,
+    identity operations (x+0, x-0, x*1, x/1, x^1, -(-x)) are dropped,
+    negated terms of sums are subtracted and nested sums and products are
+    merged into their parent. Nodes are never
+    changed in place since they may still be used in the user's script; a
+    node without anything to simplify is kept as it is.
+
+    Returns the simplified roots
+    """
+    memo = {} #id(node) -> simplified node or number
+    out = []
+    for root in roots:
+        if not isinstance(root, GK_Expression):
+            out.append(root)
+            continue
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if id(node) in memo:
+                continue
+            if not ready:
+                stack.append((node, True))
+                for o in node._operands():
+                    if isinstance(o, GK_Expression) and id(o) not in memo:
+                        stack.append((o, False))
+                continue
+            operands = node._operands()
+            new = [memo[id(o)] if isinstance(o, GK_Expression) else o for o in operands]
+            memo[id(node)] = _fold(node, operands, new)
+        out.append(memo[id(root)])
+    return out
+
+
+def _number(x):
+    return isinstance(x, numbers.Real) and not isinstance(x, bool)
+
+
+def _fold(node, operands, new):
+    """Simplified copy of node, given its simplified operands"""
+    op = node._op
+    if op in ('sum','prod'):
+        for o, n in zip(operands, new):
+            if o is not n or _number(n) or (isinstance(n, GK_Expression) \
+                    and (n._op == op or op == 'sum' and n._op == 'neg')):
+                break
+        else:
+            #no numbers, negations or nested chain to merge
+            return node
+        if op == 'sum':
+            return _fold_sum(node._operators(), new)
+        return _fold_prod(node._operators(), new)
+    if op == '^':
+        a, b = new
+        if _number(a) and _number(b):
+            #keep huge integers (not computed: 10**10**9 would take ages)
+            #and complex results for the solver
+            huge = isinstance(a, numbers.Integral) and isinstance(b, numbers.Integral) \
+                   and abs(a) > 1 and abs(b)*math.log(abs(a), 2) > 53
+            if not huge:
+                try:
+                    c = a ** b
+                    if _number(c):
+                        return c
+                except (ArithmeticError, ValueError):
+                    pass
+        elif _number(b) and b == 1:
+            return a
+    elif op == 'neg':
+        a = new[0]
+        if _number(a):
+            return -a
+        if isinstance(a, GK_Expression) and a._op == 'neg':
+            return a._args[0]
+    if all(o is n for o, n in zip(operands, new)):
+        return node
+    return GK_Expression(op, *new)
+
+
+def _fold_sum(signs, terms):
+    const = 0
+    items = [] #(sign, term)
+    for sign, t in zip(signs, terms):
+        sign = sign or '+'
+        if isinstance(t, GK_Expression) and t._op == 'neg':
+            #a+(-b) -> a-b, a-(-b) -> a+b
+            sign = '-' if sign == '+' else '+'
+            t = t._args[0]
+        if isinstance(t, GK_Expression) and t._op == 'sum':
+            #a+(b-c) -> a+b-c, a-(b-c) -> a-b+c
+            flip = {'+':'+', '-':'-'} if sign == '+' else {'+':'-', '-':'+'}
+            parts = [(flip[s or '+'], u) for s, u in zip(t._operators(), t._operands())]
+        else:
+            parts = [(sign, t)]
+        for s, u in parts:
+            if _number(u):
+                const = const + u if s == '+' else const - u
+            else:
+                items.append((s, u))
+    if const != 0 or not items:
+        if not items:
+            return const
+        items.append(('-', -const) if const < 0 else ('+', const))
+    if items[0][0] == '-':
+        #lead with a positive term: -a+b -> b-a
+        for i in range(len(items)):
+            if items[i][0] == '+':
+                items.insert(0, items.pop(i))
+                break
+        else:
+            items[0] = ('+', GK_Expression('neg', items[0][1]))
+    if len(items) == 1:
+        return items[0][1]
+    return _flat('sum', [None]+[s for s, u in items[1:]], [u for s, u in items])
+
+
+def _fold_prod(signs, factors):
+    num = 1 #numbers multiplied
+    den = 1 #numbers divided by
+    items = [] #(sign, factor)
+    for sign, f in zip(signs, factors):
+        sign = sign or '*'
+        if isinstance(f, GK_Expression) and f._op == 'prod':
+            #a*(b/c) -> a*b/c, a/(b/c) -> a/b*c
+            flip = {'*':'*', '/':'/'} if sign == '*' else {'*':'/', '/':'*'}
+            parts = [(flip[s or '*'], u) for s, u in zip(f._operators(), f._operands())]
+        else:
+            parts = [(sign, f)]
+        for s, u in parts:
+            if not _number(u) or (s == '/' and u == 0):
+                #division by zero is left for the solver to report
+                items.append((s, u))
+            elif s == '*':
+                num = num * u
+            else:
+                den = den * u
+    if den != 1:
+        if isinstance(num, numbers.Integral) and isinstance(den, numbers.Integral):
+            #2*x/4 -> x/2, x/(-2) -> -1*x/2
+            if den < 0:
+                num, den = -num, -den
+            g = abs(gcd(num, den))
+            num, den = num // g, den // g
+        else:
+            num, den = num / float(den), 1
+    if not items:
+        return num if den == 1 else num / float(den)
+    if num != 1 or items[0][0] == '/':
+        items.insert(0, ('*', num))
+    if den != 1:
+        items.append(('/', den))
+    if len(items) == 1:
+        return items[0][1]
+    return _flat('prod', [None]+[s for s, u in items[1:]], [u for s, u in items])
+
+
+#roots that stay in place (equations and objectives)
+_cse_skip = ('<','<=','>','>=','=','minimize','maximize')
+
+def _cse(self, roots):
+    """Common subexpression elimination.
+
+    Subexpressions of the model roots (intermediate definitions, equations
+    and objectives) are hash-consed by structure. Subexpressions that are
+    used more than once are promoted to generated Intermediates. Those with
+    derivatives ($x) stay in place since Intermediates can't hold them.
+
+    Returns:
+        subst: {id(node): intermediate name} to render the model with
+        defs: for each root, list of (name, node) to define before it
+    """
+    exprs = [r for r in roots if isinstance(r, GK_Expression)]
+
+    #structural id (nid) of each node, computed bottom-up
+    nids = {} #id(node) -> nid
+    table = {} #(op, signs, operand keys) -> nid
+    nodes = [] #nid -> node
+    dynamic = [] #nid -> contains a derivative
+    for root in exprs:
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if id(node) in nids:
+                continue
+            operands = node._operands()
+            if not ready:
+                stack.append((node, True))
+                for o in operands:
+                    if isinstance(o, GK_Expression) and id(o) not in nids:
+                        stack.append((o, False))
+                continue
+            keys = []
+            has_dt = False
+            for o in operands:
+                if isinstance(o, GK_Expression):
+                    keys.append(nids[id(o)])
+                    has_dt = has_dt or dynamic[nids[id(o)]]
+                else:
+                    #leaves are equal when their model text is equal
+                    keys.append(str(o))
+            has_dt = has_dt or node._op == 'dt'
+            key = (node._op, node._operators(), tuple(keys))
+            nid = table.get(key)
+            if nid is None:
+                nid = len(nodes)
+                table[key] = nid
+                nodes.append(node)
+                dynamic.append(has_dt)
+            nids[id(node)] = nid
+
+    #count uses; a repeated subexpression is only searched once so its
+    #own terms aren't counted again for each copy
+    count = [0]*len(nodes)
+    seen = set()
+    for root in exprs:
+        if nids[id(root)] in seen:
+            continue
+        seen.add(nids[id(root)])
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for o in node._operands():
+                if isinstance(o, GK_Expression):
+                    nid = nids[id(o)]
+                    count[nid] += 1
+                    if nid not in seen:
+                        seen.add(nid)
+                        stack.append(o)
+    promote = set(nid for nid in range(len(nodes)) if count[nid] > 1 \
+                  and not dynamic[nid] and nodes[nid]._op not in _cse_skip)
+
+    #name promoted subexpressions in order of first use (inner ones first)
+    used = set(x.name for x in self._constants+self._parameters \
+               +self._variables+self._arrays+self._intermediates)
+    names = {}
+    defs = []
+    done = set()
+    k = 0
+    for root in roots:
+        before = []
+        stack = [(root, False)] if isinstance(root, GK_Expression) else []
+        while stack:
+            node, ready = stack.pop()
+            nid = nids[id(node)]
+            if ready:
+                if nid in promote and nid not in names:
+                    k += 1
+                    while 'cse_%i' % k in used:
+                        k += 1
+                    names[nid] = 'cse_%i' % k
+                    before.append((names[nid], node))
+                continue
+            if nid in done:
+                continue
+            done.add(nid)
+            stack.append((node, True))
+            for o in reversed(node._operands()):
+                if isinstance(o, GK_Expression):
+                    stack.append((o, False))
+        defs.append(before)
+
+    subst = dict((i, names[nid]) for i, nid in nids.items() if nid in names)
+    return subst, defs
+
 
 def _write_csv(self):
     """Write csv file and validate data.
@@ -137,11 +555,16 @@ def _write_csv(self):
 
     file_name = self._model_name + '.csv'
 
+    #columns are collected in lists and written together at the end
+    headers = []
+    columns = []
+
     ## Dynamic data csv
     if self.options.IMODE > 3:
         #Start with time
         length = np.size(self.time)
-        csv_data = np.hstack(('time',np.array(self.time).flatten().astype(object)))
+        headers.append('time')
+        columns.append(_csv_column(self.time))
         first_array = True
     ## SS data
     else:
@@ -151,7 +574,8 @@ def _write_csv(self):
 
     #check all parameters and arrays
     for vp in self._variables+self._parameters:
-        #Only save csv data if the user changed the value (changes registered in vp.value.change)
+        #Only save csv data if the user changed the value (changes registered in vp.value.change:
+        #False, True for all values or a boolean mask of the changed elements)
         if vp.value.change is False:
             continue
         else:
@@ -181,18 +605,22 @@ def _write_csv(self):
                 #confirm that previously discretized values are the right length
                 elif np.size(vp.VALUE.value) != length:
                     raise Exception('Data arrays must have the same length, and match time discretization in dynamic problems')
-                #group data with column header
-                t = np.hstack((vp.name,np.array(vp.VALUE.value).flatten().astype(object)))
+                t = _csv_column(vp.VALUE.value)
 
-            elif isinstance(vp.value.change,list): #only certain elements should be saved
+            elif isinstance(vp.value.change,np.ndarray): #only certain elements should be saved
+                mask = vp.value.change
                 if not isinstance(vp.VALUE.value, (list,np.ndarray)):
                     vp.VALUE.value = np.ones(length)*vp.VALUE.value
                 elif len(vp.VALUE) == 1:
                     vp.VALUE = np.ones(length)*vp.VALUE[0]
-                t = np.array(vp.VALUE).astype(object)
+                values = _csv_column(vp.VALUE.value)
+                #mask of the changed elements, as long as the values
+                changed = np.zeros(len(values), dtype=bool)
+                n = min(len(mask), len(values))
+                changed[:n] = mask[:n]
+                t = np.empty(len(values), dtype=object)
                 t[:] = ' '
-                t[vp.value.change] = np.array(vp.value)[vp.value.change]
-                t = np.hstack((str(vp),t.flatten().astype(object)))
+                t[changed] = values[changed]
 
             else: #somebody broke value.change
                 raise Exception('Variable value modification monitor malfunction.')
@@ -210,7 +638,7 @@ def _write_csv(self):
                         #FDELAY shifts the location of the measurement
                         t[-1-vp.FDELAY] = 'measurement'
                     else:
-                        t[1] = "measurement"
+                        t[0] = "measurement"
 
                     #reset MEAS so it doesn't get repeated on next solve
                     vp.MEAS = None
@@ -221,26 +649,36 @@ def _write_csv(self):
             if hasattr(vp,'_override_csv'):
                 for i in vp._override_csv: #for each tuple of (position,value)
                     #set value in t array
-                    t[i[0]+1] = i[1] #index is +1 because of prepended header
+                    t[i[0]] = i[1]
 
-            if first_array == False:
-                csv_data = t
-                first_array = True
-            else:
-                try:
-                    csv_data = np.vstack((csv_data,t))
-                except ValueError:
-                    raise Exception('All variable value arrays must be the same length (and match the length of model time in dynamic problems).')
+            if len(t) != length:
+                raise Exception('All variable value arrays must be the same length (and match the length of model time in dynamic problems).')
+            headers.append(str(vp))
+            columns.append(t)
+            first_array = True
 
-    #print(csv_data)
-    #save array to csv
+    #save columns to csv
     if first_array == False: #no data
         self.csv_status = 'none'
     else:
-        np.savetxt(os.path.join(self._path,file_name), csv_data.T, delimiter=",", fmt='%1.25s')
+        with open(os.path.join(self._path,file_name), 'w') as f:
+            f.write(','.join(headers)+'\n')
+            np.savetxt(f, np.column_stack(columns), delimiter=",", fmt='%s')
         self.csv_status = 'generated'
 
 
+def _csv_column(values):
+    """Values formatted for the csv file. Numeric arrays are converted to
+    text in one vectorized call. The result is an object array so markers
+    such as 'measurement' fit in any entry."""
+    values = np.asarray(values).flatten()
+    if values.dtype.kind in 'biuf':
+        text = values.astype(str)
+    else:
+        text = np.array([str(v) for v in values])
+    return text.astype(object)
+
+
 
 def _write_info(self):
     #since there is currently no way to change variable classification after
@@ -263,32 +701,37 @@ def _generate_dbs_file(self):
     '''Write options to measurements.dbs file so it gets automatically deleted
     to prevent file build-up on the server
 
+    After a successful solve the options are kept in the application
+    database (DBS_READ), so only options changed since then are written.
+
     Returns:
         Does not return
     '''
     #set filename
     filename = 'measurements.dbs'
-    #print all global options
-    file_content = self.options.getOverridesString()
+    changed_only = self._options_synced and self.options.DBS_READ != 0 \
+                   and (self._remote or os.path.isfile(os.path.join(self._path,self._model_name+'.dbs')))
+    #print global options
+    file_content = self.options.getOverridesString(changed_only)
     #cycle through all Params and Vars to find set options
     with open(os.path.join(self._path,filename), 'w+') as f:
         f.write(file_content)
         #check for set options of each Var and Param
         for vp in self._parameters:
             for o in parameter_options[vp.type]['inputs']+parameter_options[vp.type]['inout']:
-                if o == 'VALUE':
+                if o == 'VALUE' or (changed_only and o not in vp._dirty):
                     continue
                 else: #everything else is an option
-                    if vp.__dict__[o] is not None:
-                        f.write(vp.name+'.'+o+' = '+str(vp.__dict__[o])+'\n')
+                    if getattr(vp,o) is not None:
+                        f.write(vp.name+'.'+o+' = '+str(getattr(vp,o))+'\n')
 
         for vp in self._variables:
             for o in variable_options[vp.type]['inputs']+variable_options[vp.type]['inout']:
-                if o == 'VALUE':
+                if o == 'VALUE' or (changed_only and o not in vp._dirty):
                     continue
                 else: #everything else is an option
-                    if vp.__dict__[o] is not None:
-                        f.write(vp.name+'.'+o+' = '+str(vp.__dict__[o])+'\n')
+                    if getattr(vp,o) is not None:
+                        f.write(vp.name+'.'+o+' = '+str(getattr(vp,o))+'\n')
 
 
 def _write_solver_options(self):